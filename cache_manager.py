@@ -6,10 +6,105 @@ Enables instant loads on repeated scans of the same directory
 import json
 import hashlib
 import os
+import sqlite3
+import threading
+import time
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, List, Optional
 from dataclasses import asdict
 from disk_scanner import FileNode
+from name_index import NameIndex, subtree_bounds
+
+
+class ScanSnapshot:
+    """Directory listings of one scan root, stored and read one directory at a time.
+    
+    Each row holds a listed directory's direct children; subdirectories
+    carry their subtree size, so any level of the last scan can be shown
+    without loading the rest of it. The names of saved children are kept in
+    a trigram index (names) in the same file. Every call opens its own
+    connection, so worker threads can use it freely.
+    """
+    
+    # Fields of a child entry, in storage order (a trailing total for directories)
+    FIELDS = ('name', 'is_dir', 'size', 'mtime', 'atime', 'dev', 'inode', 'uid', 'gid', 'blocks')
+    
+    def __init__(self, db_path: Path, root: str):
+        """Initialize the snapshot.
+        
+        Args:
+            db_path: SQLite file holding the listings
+            root: Scan root the listings belong to
+        """
+        self.db_path = db_path
+        self.root = root
+        self.names = NameIndex(db_path)
+        with self._connect() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS listings "
+                "(path TEXT PRIMARY KEY, saved REAL NOT NULL, children TEXT NOT NULL)"
+            )
+            NameIndex.create(db)
+    
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
+    
+    def saved_at(self) -> Optional[float]:
+        """When the root listing was last saved (None if it never was)."""
+        with self._connect() as db:
+            row = db.execute("SELECT saved FROM listings WHERE path = ?", (self.root,)).fetchone()
+        return row[0] if row else None
+    
+    def load_listing(self, path: str) -> Optional[List[FileNode]]:
+        """Get a saved directory's children as detached FileNodes (None if never listed).
+        
+        Subdirectories come back unlisted, sized by their saved subtree total.
+        """
+        with self._connect() as db:
+            row = db.execute("SELECT children FROM listings WHERE path = ?", (path,)).fetchone()
+        if row is None:
+            return None
+        
+        children = []
+        for entry in json.loads(row[0]):
+            fields = dict(zip(self.FIELDS, entry))
+            node = FileNode(path=os.path.join(path, fields['name']), **fields)
+            if node.is_dir:
+                node.measured_size = entry[len(self.FIELDS)]
+            children.append(node)
+        return children
+    
+    def save_listings(self, nodes: Iterable[FileNode]) -> bool:
+        """Save the current children of listed directories, replacing older rows.
+        
+        The name index is updated with them; listings below subdirectories
+        that are gone are dropped.
+        
+        Returns:
+            True if save succeeded, False otherwise
+        """
+        try:
+            now = time.time()
+            listed = [(node.path, list(node.children)) for node in nodes if node.is_scanned]
+            rows = [(path, now, json.dumps([self._entry(child) for child in children]))
+                    for path, children in listed]
+            with self._connect() as db:
+                db.executemany("INSERT OR REPLACE INTO listings VALUES (?, ?, ?)", rows)
+                for path, children in listed:
+                    for gone in self.names.update(db, path, children):
+                        db.execute("DELETE FROM listings WHERE path = ? OR (path >= ? AND path < ?)",
+                                   (gone, *subtree_bounds(gone)))
+            return True
+        except Exception as e:
+            print(f"Cache save failed: {e}")
+            return False
+    
+    def _entry(self, node: FileNode) -> list:
+        entry = [getattr(node, field) for field in self.FIELDS]
+        if node.is_dir:
+            entry[2] = 0
+            entry.append(node.total_size)
+        return entry
 
 
 class ScanCache:
@@ -31,25 +126,57 @@ class ScanCache:
         return hashlib.md5(normalized_path.encode()).hexdigest()
     
     def _serialize_node(self, node: FileNode) -> dict:
-        """Convert FileNode to serializable dict."""
+        """Convert FileNode to serializable dict.
+        
+        Only the root stores its full path; descendants are prefix-compressed
+        to their name and rebuilt from the parent path on load. Directories
+        record whether they were listed, so a partly explored tree reloads as
+        one and only unlisted directories are read again.
+        """
         def node_to_dict(n: FileNode) -> dict:
-            return {
+            data = {
                 'name': n.name,
-                'path': n.path,
                 'size': n.size,
+                'mtime': n.mtime,
+                'atime': n.atime,
+                'dev': n.dev,
+                'inode': n.inode,
+                'uid': n.uid,
+                'gid': n.gid,
+                'blocks': n.blocks,
                 'is_dir': n.is_dir,
                 'children': [node_to_dict(child) for child in n.children],
             }
+            if n.is_dir:
+                data['scanned'] = n.is_scanned
+                if n.measured_size >= 0:
+                    data['measured'] = n.measured_size
+            return data
         
-        return node_to_dict(node)
+        data = node_to_dict(node)
+        data['path'] = node.path
+        return data
     
     def _deserialize_node(self, data: dict, parent: Optional[FileNode] = None) -> FileNode:
         """Convert dict back to FileNode."""
+        path = data.get('path')
+        if path is None:
+            path = os.path.join(parent.path, data['name'])
+        
         node = FileNode(
             name=data['name'],
-            path=data['path'],
+            path=path,
             size=data['size'],
+            mtime=data.get('mtime', 0.0),
+            atime=data.get('atime', 0.0),
+            dev=data.get('dev', 0),
+            inode=data.get('inode', 0),
+            uid=data.get('uid', -1),  # Older caches did not record owners
+            gid=data.get('gid', -1),
+            blocks=data.get('blocks', -1),
             is_dir=data['is_dir'],
+            is_scanned=data.get('scanned', True),  # Older caches hold complete scans only
+            measured_size=data.get('measured', -1),
             parent=parent
         )
         
@@ -78,10 +205,13 @@ class ScanCache:
             cache_key = self._get_cache_key(path)
             cache_file = self.cache_dir / f"{cache_key}.json"
             
-            # Serialize and save
+            # Serialize and save; written aside and swapped in, since saves
+            # repeat while browsing and an interrupted one must not lose the last
             serialized = self._serialize_node(node)
-            with open(cache_file, 'w') as f:
+            partial_file = cache_file.with_suffix(f'.{threading.get_ident()}.tmp')
+            with open(partial_file, 'w') as f:
                 json.dump(serialized, f, indent=2)
+            os.replace(partial_file, cache_file)
             
             # Also store in memory cache
             self.memory_cache[cache_key] = node
@@ -125,6 +255,58 @@ class ScanCache:
         
         return None
     
+    def snapshot(self, path: str) -> ScanSnapshot:
+        """Get the per-directory snapshot store for a scan root.
+        
+        Args:
+            path: Directory path the snapshot belongs to
+        """
+        return ScanSnapshot(self.cache_dir / f"{self._get_cache_key(path)}.db", path)
+    
+    def load_metadata(self, name: str) -> dict:
+        """Load a persistent per-file metadata table (e.g. content hashes).
+        
+        Args:
+            name: Table name
+        
+        Returns:
+            Dict of entries, empty if none saved yet
+        """
+        if name in self.memory_cache:
+            return self.memory_cache[name]
+        
+        entries = {}
+        try:
+            meta_file = self.cache_dir / f"{name}.meta.json"
+            if meta_file.exists():
+                with open(meta_file, 'r') as f:
+                    entries = json.load(f)
+        except Exception as e:
+            print(f"Cache load failed: {e}")
+        
+        self.memory_cache[name] = entries
+        return entries
+    
+    def save_metadata(self, name: str, entries: dict) -> bool:
+        """Save a persistent per-file metadata table.
+        
+        Args:
+            name: Table name
+            entries: JSON-serializable dict
+        
+        Returns:
+            True if save succeeded, False otherwise
+        """
+        try:
+            meta_file = self.cache_dir / f"{name}.meta.json"
+            with open(meta_file, 'w') as f:
+                json.dump(entries, f)
+            self.memory_cache[name] = entries
+            return True
+        except Exception as e:
+            print(f"Cache save failed: {e}")
+            return False
+    
     def clear_cache(self, path: Optional[str] = None) -> bool:
         """Clear cache for specific path or all cache.
         
@@ -137,15 +319,17 @@ class ScanCache:
         try:
             if path is None:
                 # Clear all
-                for cache_file in self.cache_dir.glob("*.json"):
-                    cache_file.unlink()
+                for pattern in ("*.json", "*.db"):
+                    for cache_file in self.cache_dir.glob(pattern):
+                        cache_file.unlink()
                 self.memory_cache.clear()
             else:
                 # Clear specific
                 cache_key = self._get_cache_key(path)
-                cache_file = self.cache_dir / f"{cache_key}.json"
-                if cache_file.exists():
-                    cache_file.unlink()
+                for suffix in (".json", ".db"):
+                    cache_file = self.cache_dir / f"{cache_key}{suffix}"
+                    if cache_file.exists():
+                        cache_file.unlink()
                 if cache_key in self.memory_cache:
                     del self.memory_cache[cache_key]
             
@@ -0,0 +1,200 @@
+"""
+Compression Estimator - Estimate how well a subtree would compress from sampled blocks
+Blocks are sampled with probability proportional to file size, compressed with
+zlib/lzma in a process pool, and the mean ratio is extrapolated with a confidence interval.
+"""
+
+import bisect
+import lzma
+import math
+import multiprocessing
+import multiprocessing.forkserver
+import multiprocessing.resource_tracker
+import os
+import random
+import zlib
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import accumulate
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from disk_scanner import FileNode
+
+# Bytes read per sampled block
+BLOCK_BYTES = 64 * 1024
+
+# Default cap on bytes read and compressed per estimate
+SAMPLE_BUDGET_BYTES = 16 * 1024 * 1024
+
+# Two-sided 95% normal quantile
+CONFIDENCE_Z = 1.96
+
+# Start method of compression workers: estimates run from threads of the UI,
+# and a forked copy of a threaded process can deadlock on a lock another
+# thread held. forkserver is not available on Windows, where spawn is the default.
+POOL_START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+_helpers_started = False
+
+COMPRESSORS = {
+    'zlib': lambda data: len(zlib.compress(data, 6)),
+    'lzma': lambda data: len(lzma.compress(data, preset=1)),
+}
+
+
+@dataclass
+class CompressionEstimate:
+    """Extrapolated compression result for one method."""
+    method: str
+    total_bytes: int      # Bytes of file data in the subtree
+    sampled_bytes: int    # Bytes actually compressed
+    blocks: int           # Sampled blocks
+    ratio: float          # Estimated compressed / original
+    ratio_low: float      # 95% confidence interval of the ratio
+    ratio_high: float
+
+    @property
+    def estimated_size(self) -> int:
+        """Estimated compressed size of the subtree."""
+        return int(self.total_bytes * self.ratio)
+
+    @property
+    def estimated_savings(self) -> int:
+        """Estimated bytes saved by compressing the subtree."""
+        return self.total_bytes - self.estimated_size
+
+    @property
+    def savings_range(self) -> Tuple[int, int]:
+        """95% interval of the bytes saved (low, high)."""
+        return (int(self.total_bytes * (1 - self.ratio_high)),
+                int(self.total_bytes * (1 - self.ratio_low)))
+
+
+def start_pool_helpers():
+    """Start the forkserver and resource tracker used by compression workers.
+
+    Call once from the main thread at startup, before the UI takes over
+    stderr: the helpers outlive the UI and are started with stderr on the
+    null device, so nothing they print lands on the screen. Until this has
+    run, estimates on POSIX compress in the calling process.
+    """
+    global _helpers_started
+    if _helpers_started or os.name != 'posix':
+        return
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    saved = os.dup(2)
+    try:
+        os.dup2(devnull, 2)
+        if POOL_START_METHOD == 'forkserver':
+            multiprocessing.forkserver.ensure_running()
+        else:
+            multiprocessing.resource_tracker.ensure_running()
+        _helpers_started = True
+    finally:
+        os.dup2(saved, 2)
+        os.close(saved)
+        os.close(devnull)
+
+
+def _compress_block(args: Tuple[bytes, Sequence[str]]) -> List[int]:
+    """Compressed length of one block per method (runs in a worker process)."""
+    data, methods = args
+    return [COMPRESSORS[method](data) for method in methods]
+
+
+class CompressionEstimator:
+    """Estimates compressibility from a fixed byte budget, independent of tree size.
+
+    Every sampled block is drawn at a uniformly random byte of the subtree's
+    file data, so each block's compression ratio is an unbiased sample of the
+    byte-weighted ratio. Blocks are compressed independently, which ignores
+    redundancy spanning blocks; the estimate is therefore slightly conservative.
+    """
+
+    def __init__(self, budget_bytes: int = SAMPLE_BUDGET_BYTES,
+                 max_workers: Optional[int] = None, seed: Optional[int] = None):
+        """Initialize the estimator.
+
+        Args:
+            budget_bytes: Maximum bytes sampled per estimate
+            max_workers: Compression processes (0 compresses in this process, as do
+                estimates on POSIX before start_pool_helpers() has run)
+            seed: Random seed for reproducible samples
+        """
+        self.budget_bytes = budget_bytes
+        self.max_workers = max_workers
+        self.random = random.Random(seed)
+
+    def estimate(self, root: FileNode,
+                 methods: Sequence[str] = ('zlib', 'lzma')) -> Dict[str, CompressionEstimate]:
+        """Estimate compressed sizes of root's files for each method."""
+        files = [f for f in root.iter_files() if f.size > 0]
+        total = sum(f.size for f in files)
+        if total == 0:
+            return {}
+
+        blocks = self._read_samples(files, total)
+        if not blocks:
+            return {}
+
+        jobs = [(data, tuple(methods)) for data in blocks]
+        if self.max_workers == 0 or (os.name == 'posix' and not _helpers_started):
+            lengths = list(map(_compress_block, jobs))
+        else:
+            # _compress_block stays at module level so it can be pickled to the workers
+            context = multiprocessing.get_context(POOL_START_METHOD)
+            with ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context) as pool:
+                lengths = list(pool.map(_compress_block, jobs, chunksize=8))
+
+        sampled = sum(len(data) for data in blocks)
+        exact = total <= self.budget_bytes  # Every block was read: no sampling error
+        estimates = {}
+        for index, method in enumerate(methods):
+            ratios = [compressed[index] / len(data) for data, compressed in zip(blocks, lengths)]
+            mean = sum(ratios) / len(ratios)
+            if exact:
+                mean = sum(compressed[index] for compressed in lengths) / sampled
+                margin = 0.0
+            elif len(ratios) > 1:
+                variance = sum((r - mean) ** 2 for r in ratios) / (len(ratios) - 1)
+                margin = CONFIDENCE_Z * math.sqrt(variance / len(ratios))
+            else:
+                margin = mean  # A single block says little about the rest
+            estimates[method] = CompressionEstimate(
+                method=method,
+                total_bytes=total,
+                sampled_bytes=sampled,
+                blocks=len(blocks),
+                ratio=mean,
+                ratio_low=max(0.0, mean - margin),
+                # Incompressible data still grows slightly, so don't clip at 1.0
+                ratio_high=mean + margin,
+            )
+        return estimates
+
+    def _read_samples(self, files: List[FileNode], total: int) -> List[bytes]:
+        """Read size-weighted random blocks; small subtrees are read whole."""
+        if total <= self.budget_bytes:
+            picks = {i: list(range(0, f.size, BLOCK_BYTES)) for i, f in enumerate(files)}
+        else:
+            cumulative = list(accumulate(f.size for f in files))
+            picks = defaultdict(list)
+            for _ in range(max(1, self.budget_bytes // BLOCK_BYTES)):
+                position = self.random.randrange(total)
+                index = bisect.bisect_right(cumulative, position)
+                start = cumulative[index] - files[index].size
+                picks[index].append((position - start) // BLOCK_BYTES * BLOCK_BYTES)
+
+        blocks = []
+        for index, offsets in picks.items():
+            try:
+                with open(files[index].path, 'rb') as f:
+                    for offset in sorted(offsets):
+                        f.seek(offset)
+                        data = f.read(BLOCK_BYTES)
+                        if data:
+                            blocks.append(data)
+            except OSError:
+                continue  # Unreadable files are left out of the sample
+        return blocks
@@ -0,0 +1,180 @@
+"""
+Content Sniffer - Detect real file types from magic bytes instead of extensions
+Headers are read in batches on a thread pool and cached by (device, inode, size, mtime)
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from disk_scanner import FileNode
+
+# Bytes read from the start of each file
+HEADER_BYTES = 512
+
+# Name of the ScanCache metadata table holding detected types
+CONTENT_TYPE_CACHE_NAME = "content_types"
+
+# Type reported when no signature matches
+UNKNOWN_TYPE = "unknown"
+
+# (offset, magic bytes, type name); checked in order, first match wins
+SIGNATURES: List[Tuple[int, bytes, str]] = [
+    (0, b'\x7fELF', 'elf'),
+    (0, b'MZ', 'pe'),
+    (0, b'\xfe\xed\xfa\xce', 'mach-o'),
+    (0, b'\xfe\xed\xfa\xcf', 'mach-o'),
+    (0, b'\xce\xfa\xed\xfe', 'mach-o'),
+    (0, b'\xcf\xfa\xed\xfe', 'mach-o'),
+    (0, b'\xca\xfe\xba\xbe', 'java-class/mach-o-fat'),
+    (0, b'#!', 'script'),
+    (0, b'PK\x03\x04', 'zip'),
+    (0, b'PK\x05\x06', 'zip'),
+    (0, b'\x1f\x8b', 'gzip'),
+    (0, b'BZh', 'bzip2'),
+    (0, b'\xfd7zXZ\x00', 'xz'),
+    (0, b'\x28\xb5\x2f\xfd', 'zstd'),
+    (0, b"7z\xbc\xaf\x27\x1c", '7z'),
+    (0, b'Rar!\x1a\x07', 'rar'),
+    (257, b'ustar', 'tar'),
+    (0, b'SQLite format 3\x00', 'sqlite'),
+    (0, b'%PDF-', 'pdf'),
+    (0, b'\x89PNG\r\n\x1a\n', 'png'),
+    (0, b'\xff\xd8\xff', 'jpeg'),
+    (0, b'GIF87a', 'gif'),
+    (0, b'GIF89a', 'gif'),
+    (0, b'BM', 'bmp'),
+    (0, b'II*\x00', 'tiff'),
+    (0, b'MM\x00*', 'tiff'),
+    (0, b'ID3', 'mp3'),
+    (0, b'OggS', 'ogg'),
+    (0, b'fLaC', 'flac'),
+    (0, b'\x1aE\xdf\xa3', 'matroska'),
+    (4, b'ftyp', 'mp4/mov'),
+    (0, b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', 'ole2'),
+    (0, b'QFI\xfb', 'qcow2'),
+    (0, b'KDMV', 'vmdk'),
+    (0, b'conectix', 'vhd'),
+    (0, b'PGDMP', 'postgres-dump'),
+    (0, b'-- MySQL dump', 'mysql-dump'),
+    (0, b'\x00asm', 'wasm'),
+]
+
+# RIFF containers carry their real type at offset 8
+RIFF_TYPES = {b'WAVE': 'wav', b'AVI ': 'avi', b'WEBP': 'webp'}
+
+# Sizes of the BMP info headers that follow the 14-byte file header
+BMP_INFO_HEADER_SIZES = {12, 16, 40, 52, 56, 64, 108, 124}
+
+# Furthest PE header offset accepted when it lies beyond the bytes read
+PE_OFFSET_LIMIT = 64 * 1024
+
+
+def _is_pe(header: bytes) -> bool:
+    """Whether an "MZ" header points at 0x3C to a PE header (whose signature is checked if read)."""
+    if len(header) < 0x40:
+        return False
+    offset = int.from_bytes(header[0x3C:0x40], 'little')
+    if offset + 4 <= len(header):
+        return offset >= 0x40 and header[offset:offset + 4] == b'PE\x00\x00'
+    return offset < PE_OFFSET_LIMIT
+
+
+def _is_bmp(header: bytes) -> bool:
+    """Whether a "BM" header has zero reserved bytes and a known info header size."""
+    return (len(header) >= 18 and header[6:10] == b'\x00' * 4
+            and int.from_bytes(header[14:18], 'little') in BMP_INFO_HEADER_SIZES)
+
+
+# Two-byte magics that text can start with are confirmed by their header fields
+SIGNATURE_CHECKS = {'pe': _is_pe, 'bmp': _is_bmp}
+
+
+def detect_type(header: bytes) -> str:
+    """Match a file header against the signature table."""
+    if header.startswith(b'RIFF') and len(header) >= 12:
+        return RIFF_TYPES.get(header[8:12], 'riff')
+    for offset, magic, type_name in SIGNATURES:
+        if header[offset:offset + len(magic)] == magic:
+            check = SIGNATURE_CHECKS.get(type_name)
+            if check is None or check(header):
+                return type_name
+    if not header:
+        return 'empty'
+    if b'\x00' not in header:
+        try:
+            header.decode('utf-8')
+            return 'text'
+        except UnicodeDecodeError:
+            pass
+    return UNKNOWN_TYPE
+
+
+def _read_header(path: str) -> Optional[bytes]:
+    try:
+        with open(path, 'rb') as f:
+            return f.read(HEADER_BYTES)
+    except OSError:
+        return None
+
+
+class ContentSniffer:
+    """Detects file types from their first bytes, with a persistent cache."""
+
+    def __init__(self, cache=None, max_workers: Optional[int] = None):
+        """Initialize the sniffer.
+
+        Args:
+            cache: Optional ScanCache used to persist detected types between runs
+            max_workers: Header-reading threads (defaults to ThreadPoolExecutor's choice)
+        """
+        self.cache = cache
+        self.max_workers = max_workers
+        self.types = cache.load_metadata(CONTENT_TYPE_CACHE_NAME) if cache else {}
+
+    @staticmethod
+    def _cache_key(file_node: FileNode) -> str:
+        # Same key as the duplicate finder's hashes: inode numbers repeat across devices
+        return f"{file_node.dev}:{file_node.inode}:{file_node.size}:{file_node.mtime}"
+
+    def cached_type(self, file_node: FileNode) -> Optional[str]:
+        """Get a previously detected type, if the file has not changed since."""
+        if not file_node.inode:
+            return None
+        return self.types.get(self._cache_key(file_node))
+
+    def sniff(self, files: Iterable[FileNode]) -> Dict[str, str]:
+        """Detect types for files, reading uncached headers in parallel.
+
+        Returns:
+            Mapping of file path -> detected type (unreadable files are omitted)
+        """
+        results = {}
+        pending = []
+        for file_node in files:
+            detected = self.cached_type(file_node)
+            if detected is None:
+                pending.append(file_node)
+            else:
+                results[file_node.path] = detected
+
+        if pending:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                headers = pool.map(_read_header, (f.path for f in pending))
+                for file_node, header in zip(pending, headers):
+                    if header is None:
+                        continue
+                    detected = detect_type(header)
+                    results[file_node.path] = detected
+                    if file_node.inode:
+                        self.types[self._cache_key(file_node)] = detected
+            if self.cache:
+                self.cache.save_metadata(CONTENT_TYPE_CACHE_NAME, self.types)
+
+        return results
+
+    def sniff_tree(self, root: FileNode, extensions: Optional[Iterable[str]] = None) -> Dict[str, str]:
+        """Detect types for every file under root, or only the candidate extensions."""
+        if extensions is None:
+            return self.sniff(root.iter_files())
+        files = [f for ext in extensions for f in root.iter_files(ext)]
+        return self.sniff(files)
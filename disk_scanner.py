@@ -2,15 +2,30 @@
 Disk Scanner - Efficiently scan directory trees and build hierarchical data structure
 """
 
+import hashlib
+import heapq
 import os
-from pathlib import Path
+import time
+from array import array
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 from rich.progress import Progress, SpinnerColumn, BarColumn, TextColumn
 from rich.console import Console
 
+from size_histogram import merge_histogram, new_histogram, size_bin
+
 console = Console()
 
+# Number of largest files remembered per directory aggregate
+LARGEST_FILES_K = 25
+
+# Age bucket boundaries (days since last access/modification). Bucket i holds
+# files younger than AGE_BUCKET_DAYS[i]; the last bucket holds everything older.
+AGE_BUCKET_DAYS = (30, 90, 365)
+
+# A file is flagged sparse when its allocation falls short of its size by more than this
+SPARSE_SLACK_BYTES = 64 * 1024
+
 
 @dataclass
 class FileNode:
@@ -19,20 +34,36 @@ class FileNode:
     path: str
     size: int = 0
     is_dir: bool = False
+    mtime: float = 0.0  # Modification time (0 if unknown)
+    atime: float = 0.0  # Access time (0 if unknown)
+    dev: int = 0  # Device id (0 if unknown)
+    inode: int = 0  # Inode number (0 if unknown)
+    uid: int = -1  # Owner user id (-1 if unknown)
+    gid: int = -1  # Owner group id (-1 if unknown)
+    blocks: int = -1  # Allocated 512-byte blocks (-1 if unknown, e.g. on Windows)
     children: List['FileNode'] = field(default_factory=list)
     parent: Optional['FileNode'] = None
     extension_stats: dict = field(default_factory=dict)  # {ext: {count, size}}
     is_scanned: bool = False  # Track if this directory has been fully scanned
+    measured_size: int = -1  # Subtree bytes measured without listing it into the tree (-1 if not)
+    is_stale: bool = False  # Taken from a saved snapshot and not re-checked on disk yet
     _total_size_cache: int = field(default=-1)  # Cache for total_size
     _extension_stats_cache: dict = field(default_factory=dict)  # Cache for extension stats
     _stats_dirty: bool = field(default=True)  # Whether cache needs rebuild
+    _aggregate: Optional['DirectoryAggregate'] = field(default=None, repr=False)  # Subtree aggregates
     
     @property
     def total_size(self) -> int:
-        """Calculate total size including children. Cached for performance."""
+        """Calculate total size including children. Cached for performance.
+        
+        A measured directory whose subtree is only partly listed reports at
+        least its measured size.
+        """
         if self._total_size_cache == -1:
             if self.is_dir:
-                self._total_size_cache = sum(child.total_size for child in self.children)
+                self._total_size_cache = max(
+                    self.measured_size, sum(child.total_size for child in self.children)
+                )
             else:
                 self._total_size_cache = self.size
         return self._total_size_cache
@@ -71,33 +102,322 @@ class FileNode:
             self._stats_dirty = False
         return self._extension_stats_cache
     
+    def has_cached_stats(self) -> bool:
+        """Whether extension stats and aggregates are built, so reading them is cheap."""
+        return not self._stats_dirty and (not self.is_dir or self._aggregate is not None)
+    
     def invalidate_stats_cache(self):
         """Invalidate stats cache and propagate to parent."""
         self._stats_dirty = True
+        self._aggregate = None
         if self.parent:
             self.parent.invalidate_stats_cache()
     
     def _collect_extension_stats(self, stats: dict):
-        """Recursively collect extension statistics."""
+        """Merge extension counts/sizes bottom-up from direct files and child caches.
+        
+        Only counts and sizes are aggregated; file lists come from iter_files().
+        """
         for child in self.children:
             if not child.is_dir:
                 ext = child.get_extension()
-                if ext not in stats:
-                    stats[ext] = {'count': 0, 'size': 0, 'files': []}
-                stats[ext]['count'] += 1
-                stats[ext]['size'] += child.size
-                stats[ext]['files'].append(child.path)
+                entry = stats.get(ext)
+                if entry is None:
+                    entry = stats[ext] = {'count': 0, 'size': 0}
+                entry['count'] += 1
+                entry['size'] += child.size
             else:
-                child._collect_extension_stats(stats)
+                for ext, child_entry in child.get_extension_stats().items():
+                    entry = stats.get(ext)
+                    if entry is None:
+                        entry = stats[ext] = {'count': 0, 'size': 0}
+                    entry['count'] += child_entry['count']
+                    entry['size'] += child_entry['size']
+    
+    def get_aggregate(self) -> Optional['DirectoryAggregate']:
+        """Get subtree aggregates for a directory, merged bottom-up. Cached."""
+        if not self.is_dir:
+            return None
+        if self._aggregate is None:
+            self._aggregate = DirectoryAggregate.build(self)
+        return self._aggregate
+    
+    def get_largest_files(self, limit: int = LARGEST_FILES_K) -> List['FileNode']:
+        """Get the largest files in this subtree (largest first)."""
+        if not self.is_dir:
+            return [self]
+        return self.get_aggregate().largest_files[:limit]
+    
+    @property
+    def allocated_size(self) -> int:
+        """Bytes actually allocated on disk (falls back to size if unknown)."""
+        return self.blocks * 512 if self.blocks >= 0 else self.size
+    
+    @property
+    def is_sparse(self) -> bool:
+        """Whether a file has noticeably fewer bytes allocated than its size (holes)."""
+        return (not self.is_dir and self.blocks >= 0
+                and self.allocated_size + SPARSE_SLACK_BYTES < self.size)
+    
+    @property
+    def last_touched(self) -> float:
+        """Most recent of access and modification time (0 if unknown)."""
+        return max(self.mtime, self.atime)
+    
+    def iter_files(self, extension: Optional[str] = None) -> Iterator['FileNode']:
+        """Lazily yield files in this subtree, optionally only one extension.
+        
+        Subdirectories whose (clean) extension stats show no matching files
+        are skipped without being walked.
+        """
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            for child in node.children:
+                if child.is_dir:
+                    if (extension is not None and not child._stats_dirty
+                            and extension not in child._extension_stats_cache):
+                        continue
+                    stack.append(child)
+                elif extension is None or child.get_extension() == extension:
+                    yield child
+    
+    def iter_file_paths(self, extension: Optional[str] = None) -> Iterator[str]:
+        """Lazily yield file paths in this subtree (see iter_files)."""
+        for child in self.iter_files(extension):
+            yield child.path
     
     def get_extension(self) -> str:
         """Get file extension."""
         if self.is_dir:
             return '<dir>'
-        ext = Path(self.path).suffix.lower()
+        ext = os.path.splitext(self.name)[1].lower()
         return ext if ext else '<no-ext>'
 
 
+@dataclass
+class DirectoryAggregate:
+    """Per-directory summary of its whole subtree, built from child aggregates."""
+    largest_files: List[FileNode] = field(default_factory=list)  # Bounded top-K, largest first
+    size_histogram: array = field(default_factory=new_histogram)  # File counts per log2 size bin
+    age_bytes: array = field(default_factory=lambda: array('Q', bytes(8 * (len(AGE_BUCKET_DAYS) + 1))))  # Bytes per age bucket
+    fingerprint: bytes = b''  # Structural hash of sorted child names, sizes and child fingerprints
+    owner_usage: Dict[int, List[int]] = field(default_factory=dict)  # uid -> [bytes, files]
+    group_usage: Dict[int, List[int]] = field(default_factory=dict)  # gid -> [bytes, files]
+    oldest_mtime: float = 0.0  # Range of known file mtimes in the subtree (0 if none)
+    newest_mtime: float = 0.0
+    allocated_bytes: int = 0  # Bytes allocated on disk (holes in sparse files excluded)
+    sparse_files: int = 0  # Files flagged is_sparse
+    
+    @property
+    def max_file_size(self) -> int:
+        """Size of the largest file in the subtree (-1 if there are no files)."""
+        return self.largest_files[0].size if self.largest_files else -1
+    
+    @classmethod
+    def build(cls, node: FileNode) -> 'DirectoryAggregate':
+        """Merge direct files and child directory aggregates into one summary."""
+        aggregate = cls()
+        candidates = []
+        histogram = aggregate.size_histogram
+        age_bytes = aggregate.age_bytes
+        now = time.time()
+        for child in node.children:
+            if child.is_dir:
+                child_aggregate = child.get_aggregate()
+                candidates.extend(child_aggregate.largest_files)
+                merge_histogram(histogram, child_aggregate.size_histogram)
+                for index, size in enumerate(child_aggregate.age_bytes):
+                    age_bytes[index] += size
+                _merge_usage(aggregate.owner_usage, child_aggregate.owner_usage)
+                _merge_usage(aggregate.group_usage, child_aggregate.group_usage)
+                aggregate._include_mtimes(child_aggregate.oldest_mtime, child_aggregate.newest_mtime)
+                aggregate.allocated_bytes += child_aggregate.allocated_bytes
+                aggregate.sparse_files += child_aggregate.sparse_files
+            else:
+                candidates.append(child)
+                histogram[size_bin(child.size)] += 1
+                touched = child.last_touched
+                if touched:  # Files with unknown times are not bucketed
+                    age_bytes[age_bucket(now - touched)] += child.size
+                _add_usage(aggregate.owner_usage, child.uid, child.size)
+                _add_usage(aggregate.group_usage, child.gid, child.size)
+                aggregate._include_mtimes(child.mtime, child.mtime)
+                aggregate.allocated_bytes += child.allocated_size
+                aggregate.sparse_files += child.is_sparse
+        
+        aggregate.largest_files = heapq.nlargest(LARGEST_FILES_K, candidates, key=lambda f: f.size)
+        aggregate.fingerprint = directory_fingerprint(node)
+        return aggregate
+    
+    def _include_mtimes(self, oldest: float, newest: float):
+        """Widen the known mtime range (zeros mean unknown and are ignored)."""
+        if oldest and (not self.oldest_mtime or oldest < self.oldest_mtime):
+            self.oldest_mtime = oldest
+        if newest > self.newest_mtime:
+            self.newest_mtime = newest
+    
+    def stale_bytes(self, days: int) -> int:
+        """Bytes not touched for at least `days` (one of AGE_BUCKET_DAYS)."""
+        first = AGE_BUCKET_DAYS.index(days) + 1
+        return sum(self.age_bytes[first:])
+
+
+def _add_usage(usage: Dict[int, List[int]], key: int, size: int):
+    """Count one file of `size` bytes for an owner/group id."""
+    entry = usage.get(key)
+    if entry is None:
+        usage[key] = [size, 1]
+    else:
+        entry[0] += size
+        entry[1] += 1
+
+
+def _merge_usage(usage: Dict[int, List[int]], child_usage: Dict[int, List[int]]):
+    """Merge a child's owner/group totals into usage."""
+    for key, (size, files) in child_usage.items():
+        entry = usage.get(key)
+        if entry is None:
+            usage[key] = [size, files]
+        else:
+            entry[0] += size
+            entry[1] += files
+
+
+def directory_fingerprint(node: FileNode) -> bytes:
+    """Hash a directory's structure from its children's metadata (no file contents).
+    
+    Two directories get the same fingerprint when they hold the same names
+    with the same sizes, recursively; the directory's own name is ignored.
+    Child directory aggregates must be buildable (they are built on demand).
+    """
+    hasher = hashlib.blake2b(digest_size=16)
+    for child in sorted(node.children, key=lambda c: c.name):
+        hasher.update(child.name.encode('utf-8', 'surrogateescape'))
+        if child.is_dir:
+            hasher.update(b'\0d')
+            hasher.update(child.get_aggregate().fingerprint)
+        else:
+            hasher.update(b'\0f')
+            hasher.update(child.size.to_bytes(8, 'little'))
+    return hasher.digest()
+
+
+def age_bucket(age_seconds: float) -> int:
+    """Get the AGE_BUCKET_DAYS bucket index for an age in seconds."""
+    age_days = age_seconds / 86400
+    for index, days in enumerate(AGE_BUCKET_DAYS):
+        if age_days < days:
+            return index
+    return len(AGE_BUCKET_DAYS)
+
+
+def measure_tree(path: str, cancelled: Optional[Callable[[], bool]] = None,
+                 progress: Optional[Callable[[int, int], None]] = None) -> Optional[Tuple[int, int]]:
+    """Get (total bytes, file count) under path with os.scandir, without building nodes.
+    
+    Symlinks are skipped as in DiskScanner; unreadable entries are ignored.
+    Returns None if cancelled() becomes true. Both callbacks run once per
+    directory; progress receives the running totals.
+    """
+    total = files = 0
+    stack = [path]
+    while stack:
+        if cancelled is not None and cancelled():
+            return None
+        if progress is not None:
+            progress(total, files)
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_symlink():
+                            continue
+                        if entry.is_dir():
+                            stack.append(entry.path)
+                        else:
+                            total += entry.stat().st_size
+                            files += 1
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+    return total, files
+
+
+def make_file_node(name: str, path: str, parent: Optional[FileNode] = None, **kwargs) -> FileNode:
+    """Create a file FileNode, taking size and times from a single stat call."""
+    try:
+        st = os.stat(path)
+    except (OSError, PermissionError):
+        return FileNode(name=name, path=path, is_dir=False, parent=parent, **kwargs)
+    
+    return FileNode(
+        name=name,
+        path=path,
+        size=st.st_size,
+        mtime=st.st_mtime,
+        atime=st.st_atime,
+        dev=st.st_dev,
+        inode=st.st_ino,
+        # Windows reports 0 for every owner
+        uid=st.st_uid if os.name == 'posix' else -1,
+        gid=st.st_gid if os.name == 'posix' else -1,
+        blocks=getattr(st, 'st_blocks', -1),
+        is_dir=False,
+        parent=parent,
+        **kwargs
+    )
+
+
+class CompactPathList:
+    """List of file paths with prefix-compressed directory components.
+    
+    Each distinct parent directory is stored once; entries keep only an index
+    into that prefix table plus the file name.
+    """
+    
+    __slots__ = ('_prefixes', '_prefix_ids', '_entry_prefix', '_entry_names')
+    
+    def __init__(self, paths: Iterable[str] = ()):
+        self._prefixes: List[str] = []
+        self._prefix_ids: dict = {}
+        self._entry_prefix = array('I')
+        self._entry_names: List[str] = []
+        for path in paths:
+            self.append(path)
+    
+    def append(self, path: str):
+        """Add a path, sharing its directory prefix with earlier entries."""
+        head, tail = os.path.split(path)
+        prefix_id = self._prefix_ids.get(head)
+        if prefix_id is None:
+            prefix_id = len(self._prefixes)
+            self._prefixes.append(head)
+            self._prefix_ids[head] = prefix_id
+        self._entry_prefix.append(prefix_id)
+        self._entry_names.append(tail)
+    
+    def _path_at(self, index: int) -> str:
+        return os.path.join(self._prefixes[self._entry_prefix[index]], self._entry_names[index])
+    
+    def __len__(self) -> int:
+        return len(self._entry_names)
+    
+    def __iter__(self) -> Iterator[str]:
+        for index in range(len(self._entry_names)):
+            yield self._path_at(index)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._path_at(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("CompactPathList index out of range")
+        return self._path_at(index)
+
+
 class DiskScanner:
     """Scans disk and builds directory tree."""
     
@@ -106,10 +426,11 @@ class DiskScanner:
         self.total_dirs = 0
         self.total_files = 0
     
-    def scan(self, max_depth: Optional[int] = None) -> FileNode:
+    def scan(self, max_depth: Optional[int] = None, show_progress: bool = True) -> FileNode:
         """
         Scan the drive and return root FileNode.
-        Uses progress bar for user feedback.
+        Uses progress bar for user feedback unless show_progress is False
+        (e.g. when running inside the Textual UI).
         """
         root = FileNode(
             name=self.drive,
@@ -117,6 +438,11 @@ class DiskScanner:
             is_dir=True
         )
         
+        if not show_progress:
+            self._scan_recursive(root, None, None, max_depth=max_depth)
+            root.is_scanned = True
+            return root
+        
         with Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
@@ -129,7 +455,7 @@ class DiskScanner:
         
         return root
     
-    def _scan_recursive(self, node: FileNode, progress: Progress, task, 
+    def _scan_recursive(self, node: FileNode, progress: Optional[Progress], task, 
                         current_depth: int = 0, max_depth: Optional[int] = None):
         """Recursively scan directories."""
         
@@ -140,10 +466,13 @@ class DiskScanner:
         try:
             entries = os.listdir(node.path)
         except (PermissionError, OSError):
-            progress.update(task, description=f"[cyan]Scanning (access denied: {node.name})...")
+            node.is_scanned = True  # Nothing more to list; don't retry on expand
+            if progress:
+                progress.update(task, description=f"[cyan]Scanning (access denied: {node.name})...")
             return
         
-        progress.update(task, description=f"[cyan]Scanning: {node.name}...")
+        if progress:
+            progress.update(task, description=f"[cyan]Scanning: {node.name}...")
         
         for entry in entries:
             try:
@@ -166,18 +495,7 @@ class DiskScanner:
                 
                 else:
                     # File
-                    try:
-                        size = os.path.getsize(full_path)
-                    except (OSError, PermissionError):
-                        size = 0
-                    
-                    child = FileNode(
-                        name=entry,
-                        path=full_path,
-                        size=size,
-                        is_dir=False,
-                        parent=node
-                    )
+                    child = make_file_node(entry, full_path, parent=node)
                     node.children.append(child)
                     self.total_files += 1
             
@@ -185,7 +503,9 @@ class DiskScanner:
                 # Skip files/dirs we can't access
                 continue
         
+        node.is_scanned = True
         # Sort children by size
         node.children.sort(key=lambda x: x.total_size, reverse=True)
-        # Mark that caches are now valid (we just built this subtree)
-        node._stats_dirty = False
+        # Build aggregates bottom-up while the children's caches are warm
+        node.get_extension_stats()
+        node.get_aggregate()
@@ -0,0 +1,283 @@
+"""
+Duplicate Finder - Staged duplicate file detection over a scanned FileNode tree
+Groups by size, then by a hash of the first/last 64 KB, then by a full BLAKE2b hash.
+Whole duplicate directories are found from structural fingerprints in the aggregates.
+"""
+
+import hashlib
+import mmap
+import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional
+
+from disk_scanner import FileNode
+
+# Bytes hashed from each end of a file in the partial-hash stage
+PARTIAL_HASH_BYTES = 64 * 1024
+
+# Read size for full hashes when mmap is not available
+HASH_CHUNK_BYTES = 1024 * 1024
+
+# Name of the ScanCache metadata table holding hashes
+HASH_CACHE_NAME = "file_hashes"
+
+
+@dataclass
+class DuplicateGroup:
+    """A set of files with identical content."""
+    size: int
+    digest: str
+    files: List[FileNode] = field(default_factory=list)
+
+    @property
+    def reclaimable(self) -> int:
+        """Bytes freed by keeping a single copy."""
+        return self.size * (len(self.files) - 1)
+
+
+@dataclass
+class DuplicateDirectoryGroup:
+    """A set of directories with identical structure (and content, if verified)."""
+    size: int
+    fingerprint: str
+    directories: List[FileNode] = field(default_factory=list)
+    verified: bool = False
+
+    @property
+    def reclaimable(self) -> int:
+        """Bytes freed by keeping a single copy."""
+        return self.size * (len(self.directories) - 1)
+
+
+@dataclass
+class DuplicateReport:
+    """Result of a duplicate search."""
+    groups: List[DuplicateGroup] = field(default_factory=list)
+    reclaimable_by_directory: Dict[str, int] = field(default_factory=dict)  # dir path -> bytes
+
+    @property
+    def reclaimable(self) -> int:
+        """Total bytes freed by removing every redundant copy."""
+        return sum(group.reclaimable for group in self.groups)
+
+
+class DuplicateFinder:
+    """Finds duplicate files in three stages, hashing only what is still ambiguous.
+
+    Hashes are cached by (dev, inode, size, mtime), so a file is re-read only
+    when it changes. Hashing runs in a thread pool; hashlib releases the GIL
+    while digesting large buffers.
+    """
+
+    def __init__(self, cache=None, max_workers: Optional[int] = None, min_size: int = 1):
+        """Initialize the finder.
+
+        Args:
+            cache: Optional ScanCache used to persist hashes between runs
+            max_workers: Hashing threads (defaults to ThreadPoolExecutor's choice)
+            min_size: Ignore files smaller than this many bytes
+        """
+        self.cache = cache
+        self.max_workers = max_workers
+        self.min_size = min_size
+        self.hash_cache = cache.load_metadata(HASH_CACHE_NAME) if cache else {}
+
+    def find(self, root: FileNode,
+             progress: Optional[Callable[[str], None]] = None) -> DuplicateReport:
+        """Find duplicate files under root.
+
+        Args:
+            root: Scanned directory to search
+            progress: Optional callback receiving short stage descriptions
+        """
+        notify = progress or (lambda message: None)
+
+        # Stage 1: size. Hard links share an inode and are not duplicates.
+        notify("Grouping files by size...")
+        by_size = defaultdict(list)
+        seen_inodes = set()
+        for file_node in root.iter_files():
+            if file_node.size < self.min_size:
+                continue
+            if file_node.inode:
+                key = (file_node.dev, file_node.inode)
+                if key in seen_inodes:
+                    continue
+                seen_inodes.add(key)
+            by_size[file_node.size].append(file_node)
+        candidates = [group for group in by_size.values() if len(group) > 1]
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            # Stage 2: first and last 64 KB
+            notify(f"Partial hashing {sum(len(g) for g in candidates)} files...")
+            candidates = self._split_by_hash(pool, candidates, partial=True)
+
+            # Stage 3: full content (files that fit in the partial window are already exact)
+            notify(f"Full hashing {sum(len(g) for g in candidates)} files...")
+            needs_full = [g for g in candidates if g[0].size > 2 * PARTIAL_HASH_BYTES]
+            exact = [g for g in candidates if g[0].size <= 2 * PARTIAL_HASH_BYTES]
+            exact.extend(self._split_by_hash(pool, needs_full, partial=False))
+
+        if self.cache:
+            self.cache.save_metadata(HASH_CACHE_NAME, self.hash_cache)
+
+        groups = []
+        for files in exact:
+            files.sort(key=lambda f: f.path)
+            digest = self._cached_hash(files[0], partial=files[0].size <= 2 * PARTIAL_HASH_BYTES)
+            groups.append(DuplicateGroup(size=files[0].size, digest=digest or "", files=files))
+        groups.sort(key=lambda g: g.reclaimable, reverse=True)
+
+        return DuplicateReport(
+            groups=groups,
+            reclaimable_by_directory=self._reclaimable_by_directory(groups, root),
+        )
+
+    def find_directories(self, root: FileNode, verify: bool = False) -> List[DuplicateDirectoryGroup]:
+        """Find identical subtrees under root from their structural fingerprints.
+
+        With verify=True, candidates are split again by the full hashes of
+        their files, so only byte-identical subtrees remain. Only the
+        outermost duplicates are reported: after any content split, a group
+        is dropped when its members are the copies held by the members of
+        one other group (each in a different parent of that group).
+
+        Args:
+            root: Scanned directory to search
+            verify: Confirm candidates by hashing file contents
+        """
+        by_fingerprint = defaultdict(list)
+        stack = [root]
+        while stack:
+            directory = stack.pop()
+            for child in directory.children:
+                if child.is_dir:
+                    stack.append(child)
+                    if child.total_size > 0:
+                        by_fingerprint[child.get_aggregate().fingerprint].append(child)
+
+        groups = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for fingerprint, directories in by_fingerprint.items():
+                if len(directories) < 2:
+                    continue
+                candidates = self._split_by_content(pool, directories) if verify else [directories]
+                for members in candidates:
+                    members.sort(key=lambda d: d.path)
+                    groups.append(DuplicateDirectoryGroup(
+                        size=members[0].total_size,
+                        fingerprint=fingerprint.hex(),
+                        directories=members,
+                        verified=verify,
+                    ))
+
+        if verify and self.cache:
+            self.cache.save_metadata(HASH_CACHE_NAME, self.hash_cache)
+
+        group_of = {id(d): index for index, group in enumerate(groups) for d in group.directories}
+
+        def implied(group: DuplicateDirectoryGroup) -> bool:
+            parents = {id(d.parent) for d in group.directories}
+            parent_groups = {group_of.get(parent) for parent in parents}
+            return len(parents) == len(group.directories) and len(parent_groups) == 1 and None not in parent_groups
+
+        groups = [group for group in groups if not implied(group)]
+        groups.sort(key=lambda g: g.reclaimable, reverse=True)
+        return groups
+
+    def _split_by_content(self, pool: ThreadPoolExecutor,
+                          directories: List[FileNode]) -> List[List[FileNode]]:
+        """Split structurally identical directories by the full hashes of their files."""
+        by_content = defaultdict(list)
+        for directory in directories:
+            files = sorted(directory.iter_files(), key=lambda f: os.path.relpath(f.path, directory.path))
+            digests = list(pool.map(lambda f: self._cached_hash(f, partial=False), files))
+            if any(digest is None for digest in digests):
+                continue  # Unreadable files cannot be confirmed
+            content = hashlib.blake2b(digest_size=16)
+            for file_node, digest in zip(files, digests):
+                content.update(os.path.relpath(file_node.path, directory.path).encode('utf-8', 'surrogateescape'))
+                content.update(digest.encode())
+            by_content[content.digest()].append(directory)
+        return [group for group in by_content.values() if len(group) > 1]
+
+    def _split_by_hash(self, pool: ThreadPoolExecutor, groups: Iterable[List[FileNode]],
+                       partial: bool) -> List[List[FileNode]]:
+        """Refine candidate groups by hash; drop singletons and unreadable files."""
+        files = [f for group in groups for f in group]
+        digests = pool.map(lambda f: self._cached_hash(f, partial), files)
+
+        refined = defaultdict(list)
+        for file_node, digest in zip(files, digests):
+            if digest is not None:
+                refined[(file_node.size, digest)].append(file_node)
+        return [group for group in refined.values() if len(group) > 1]
+
+    def _cached_hash(self, file_node: FileNode, partial: bool) -> Optional[str]:
+        """Get a partial or full hash, reusing the (dev, inode, size, mtime) cache."""
+        key = f"{file_node.dev}:{file_node.inode}:{file_node.size}:{file_node.mtime}"
+        field_name = 'partial' if partial else 'full'
+        entry = self.hash_cache.get(key) if file_node.inode else None
+        if entry and field_name in entry:
+            return entry[field_name]
+
+        try:
+            digest = _partial_hash(file_node.path, file_node.size) if partial else _full_hash(file_node.path)
+        except (OSError, ValueError):
+            return None
+
+        if file_node.inode:
+            self.hash_cache.setdefault(key, {})[field_name] = digest
+        return digest
+
+    @staticmethod
+    def _reclaimable_by_directory(groups: List[DuplicateGroup], root: FileNode) -> Dict[str, int]:
+        """Attribute each redundant copy's bytes to its directory and all ancestors up to root.
+
+        The first file of each group (by path) is treated as the copy to keep.
+        """
+        totals = defaultdict(int)
+        for group in groups:
+            for file_node in group.files[1:]:
+                directory = file_node.parent
+                while directory is not None:
+                    totals[directory.path] += group.size
+                    if directory is root:
+                        break
+                    directory = directory.parent
+        return dict(totals)
+
+
+def _partial_hash(path: str, size: int) -> str:
+    """BLAKE2b over the first and last PARTIAL_HASH_BYTES of a file."""
+    hasher = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        hasher.update(f.read(PARTIAL_HASH_BYTES))
+        if size > PARTIAL_HASH_BYTES:
+            f.seek(max(PARTIAL_HASH_BYTES, size - PARTIAL_HASH_BYTES))
+            hasher.update(f.read(PARTIAL_HASH_BYTES))
+    return hasher.hexdigest()
+
+
+def _full_hash(path: str) -> str:
+    """BLAKE2b over the whole file, via mmap with a chunked-read fallback."""
+    hasher = hashlib.blake2b()
+    with open(path, 'rb') as f:
+        try:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                hasher.update(mapped)
+            return hasher.hexdigest()
+        except (OSError, ValueError):
+            # Empty files, special files or platforms without mmap support
+            f.seek(0)
+
+        buffer = bytearray(HASH_CHUNK_BYTES)
+        view = memoryview(buffer)
+        while True:
+            read = f.readinto(buffer)
+            if not read:
+                break
+            hasher.update(view[:read])
+    return hasher.hexdigest()
@@ -2,9 +2,16 @@
 File Type Analysis - Analyze file types and statistics
 """
 
-from typing import Dict, List, Tuple
+import heapq
+from collections import OrderedDict
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Tuple
 from disk_scanner import FileNode
 from copilot_analyzer import CopilotBinaryAnalyzer
+from content_sniffer import ContentSniffer
+
+# Nodes whose sorted statistics are memoized per analyzer
+STATS_MEMO_SIZE = 256
 
 
 class FileTypeAnalyzer:
@@ -12,39 +19,96 @@ class FileTypeAnalyzer:
     
     def __init__(self):
         self.copilot = CopilotBinaryAnalyzer()
+        # id(node) -> (node, ext_stats token, entries, {top_n: result}); LRU ordered
+        self._stats_memo = OrderedDict()
     
     def get_statistics(self, node: FileNode, top_n: int = 10) -> List[Tuple[str, Dict]]:
         """
         Get file type statistics sorted by size.
         
+        Results are memoized per node and invalidated with the node's stats
+        cache (_stats_dirty); the node's cached dicts are never modified.
+        
         Returns:
             List of (extension, stats_dict) tuples
             stats_dict contains: count, size, percentage_by_size, percentage_by_count
         """
+        # get_extension_stats() returns a new dict after invalidation, so its
+        # identity tells whether the memoized result is still current
         ext_stats = node.get_extension_stats()
+        memo = self._memo_get(self._stats_memo, node, ext_stats)
+        if memo is None:
+            memo = (node, ext_stats, self._with_percentages(ext_stats), {})
+            self._memo_put(self._stats_memo, node, memo)
+        
+        entries, results = memo[2], memo[3]
+        if top_n not in results:
+            # Partial selection: only the top_n entries are ordered
+            results[top_n] = heapq.nlargest(top_n, entries, key=lambda x: x[1]['size'])
+        return results[top_n]
+    
+    @staticmethod
+    def _with_percentages(ext_stats: dict) -> List[Tuple[str, Dict]]:
+        """Copy extension stats (minus directories) and add percentage fields."""
+        entries = [(ext, stats) for ext, stats in ext_stats.items() if ext != '<dir>']
+        total_size = sum(stats['size'] for _, stats in entries)
+        total_count = sum(stats['count'] for _, stats in entries)
+        
+        return [
+            (ext, {
+                'count': stats['count'],
+                'size': stats['size'],
+                'percentage_by_size': (stats['size'] / total_size * 100) if total_size > 0 else 0,
+                'percentage_by_count': (stats['count'] / total_count * 100) if total_count > 0 else 0,
+            })
+            for ext, stats in entries
+        ]
+    
+    @staticmethod
+    def _memo_get(memo: OrderedDict, node: FileNode, token) -> Optional[tuple]:
+        """Get a memo entry if it belongs to node and its stats token is current."""
+        entry = memo.get(id(node))
+        if entry is None or entry[0] is not node or entry[1] is not token:
+            return None
+        memo.move_to_end(id(node))
+        return entry
+    
+    @staticmethod
+    def _memo_put(memo: OrderedDict, node: FileNode, entry: tuple):
+        """Store a memo entry, evicting the least recently used beyond STATS_MEMO_SIZE."""
+        memo[id(node)] = entry
+        memo.move_to_end(id(node))
+        while len(memo) > STATS_MEMO_SIZE:
+            memo.popitem(last=False)
+    
+    def get_detected_type_statistics(self, node: FileNode, sniffer: ContentSniffer,
+                                     top_n: int = 10) -> List[Tuple[str, Dict]]:
+        """
+        Get statistics grouped by sniffed content type instead of extension.
         
-        # Remove directory entries
-        ext_stats = {k: v for k, v in ext_stats.items() if k != '<dir>'}
-        
-        if not ext_stats:
-            return []
-        
-        total_size = sum(v['size'] for v in ext_stats.values())
-        total_count = sum(v['count'] for v in ext_stats.values())
-        
-        # Calculate percentages
-        for ext, stats in ext_stats.items():
-            stats['percentage_by_size'] = (stats['size'] / total_size * 100) if total_size > 0 else 0
-            stats['percentage_by_count'] = (stats['count'] / total_count * 100) if total_count > 0 else 0
-        
-        # Sort by size descending
-        sorted_stats = sorted(
-            ext_stats.items(),
-            key=lambda x: x[1]['size'],
-            reverse=True
-        )
-        
-        return sorted_stats[:top_n]
+        Returns:
+            List of (type, stats_dict) tuples sorted by size
+            stats_dict contains: count, size, percentage_by_size, percentage_by_count,
+            extensions ({extension: count} of files detected as this type)
+        """
+        files = {file_node.path: file_node for file_node in node.iter_files()}
+        detected = sniffer.sniff(files.values())
+        
+        by_type = {}
+        for path, content_type in detected.items():
+            file_node = files[path]
+            stats = by_type.get(content_type)
+            if stats is None:
+                stats = by_type[content_type] = {'count': 0, 'size': 0, 'extensions': {}}
+            stats['count'] += 1
+            stats['size'] += file_node.size
+            ext = file_node.get_extension()
+            stats['extensions'][ext] = stats['extensions'].get(ext, 0) + 1
+        
+        entries = self._with_percentages(by_type)
+        for content_type, stats in entries:
+            stats['extensions'] = by_type[content_type]['extensions']
+        return heapq.nlargest(top_n, entries, key=lambda x: x[1]['size'])
     
     def format_statistics(self, statistics: List[Tuple[str, Dict]]) -> str:
         """Format statistics for display."""
@@ -62,7 +126,10 @@ class FileTypeAnalyzer:
         return output
     
     def get_file_type_info(self, extension: str, statistics: List[Tuple[str, Dict]]) -> Dict:
-        """Get detailed info about a specific file type."""
+        """Get detailed info about a specific file type.
+        
+        File paths are not included; use iter_file_paths() to walk them lazily.
+        """
         for ext, stats in statistics:
             if ext.lower() == extension.lower():
                 return {
@@ -71,40 +138,33 @@ class FileTypeAnalyzer:
                     'size': stats['size'],
                     'percentage_by_size': stats['percentage_by_size'],
                     'percentage_by_count': stats['percentage_by_count'],
-                    'files': stats['files']
                 }
         return None
     
-    def analyze_file_type(self, extension: str, stats: Dict) -> str:
+    def iter_file_paths(self, node: FileNode, extension: str) -> Iterator[str]:
+        """Lazily yield paths of files with the given extension under node."""
+        return node.iter_file_paths(extension)
+    
+    def analyze_file_type(self, extension: str, stats: Dict, node: Optional[FileNode] = None) -> str:
         """Get Copilot analysis of a file type."""
+        samples = list(islice(self.iter_file_paths(node, extension), 5)) if node else []
         return self.copilot.analyze_file_type(
             extension,
-            stats['files'][:5],  # Sample 5 files
+            samples,  # Sample 5 files
             stats['count'],
             stats['size']
         )
     
     def check_security(self, extension: str, node: FileNode) -> Dict:
         """Check security concerns for file type."""
-        locations = []
-        
-        # Find where these files are located
-        all_files = []
-        self._collect_files(node, all_files)
-        
-        for f in all_files:
-            if f.path.endswith(extension):
-                locations.append(f.path)
-        
-        return self.copilot.check_security_risks(extension, locations[:5])
-    
-    def _collect_files(self, node: FileNode, files: List):
-        """Recursively collect all files."""
-        for child in node.children:
-            if child.is_dir:
-                self._collect_files(child, files)
-            else:
-                files.append(child)
+        # Find where these files are located; keys of the extension stats are
+        # lowercase and dotted, and subtrees without the extension are skipped
+        key = extension.lower()
+        if not key.startswith(('.', '<')):
+            key = '.' + key
+        locations = list(islice(self.iter_file_paths(node, key), 5))
+        
+        return self.copilot.check_security_risks(extension, locations)
     
     def get_security_summary(self, node: FileNode) -> Dict:
         """Get overall security summary for directory."""
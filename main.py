@@ -13,6 +13,7 @@ from rich.panel import Panel
 from pathlib import Path
 import string
 
+from compress_estimator import start_pool_helpers
 from textual_ui import DiskVisualizerApp
 
 
@@ -170,6 +171,7 @@ class MainApp(App):
 
 def main():
     """Main entry point."""
+    start_pool_helpers()  # Before the app captures stderr
     app = MainApp()
     app.run()
 
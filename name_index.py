@@ -0,0 +1,183 @@
+"""
+Name Index - Trigram index over scanned file and directory names for search-as-you-type
+"""
+
+import os
+import sqlite3
+from pathlib import Path
+from typing import Iterable, Iterator, List, Tuple
+
+from disk_scanner import FileNode
+
+# Candidates fetched from the database per streamed batch
+SEARCH_BATCH_SIZE = 200
+
+# Posting list entries counted per trigram when picking the rarest one
+GRAM_COUNT_LIMIT = 10000
+
+
+def trigrams(text: str) -> set:
+    """Lowercase three-character substrings of text (empty for shorter text)."""
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def subtree_bounds(path: str) -> Tuple[str, str]:
+    """Range [low, high) of strings that are paths strictly below path."""
+    prefix = path.rstrip(os.sep) + os.sep
+    return prefix, prefix[:-1] + chr(ord(os.sep) + 1)
+
+
+class NameIndex:
+    """Names of listed directories' children, with a trigram posting table.
+
+    Lives in the same SQLite file as the snapshot listings and is updated
+    in the same transaction, one directory at a time. Each saved listing is
+    diffed against what is indexed for that directory, so re-saving an
+    unchanged listing only refreshes sizes. Postings carry the entry's size,
+    so a search walks the posting list of the query's rarest trigram from the
+    largest entry down, a LIMITed batch at a time, and keeps the names that
+    contain the query; nothing is sorted.
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+
+    @staticmethod
+    def create(db: sqlite3.Connection):
+        """Create the index tables if they do not exist yet."""
+        columns = [row[1] for row in db.execute("PRAGMA table_info(grams)")]
+        rebuild = bool(columns) and 'size' not in columns
+        if rebuild:
+            db.execute("DROP TABLE grams")  # Postings saved before they carried sizes
+        db.executescript(
+            "CREATE TABLE IF NOT EXISTS names ("
+            " id INTEGER PRIMARY KEY, parent TEXT NOT NULL, name TEXT NOT NULL,"
+            " is_dir INTEGER NOT NULL, size INTEGER NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS names_parent ON names (parent);"
+            "CREATE INDEX IF NOT EXISTS names_size ON names (size, id);"
+            "CREATE TABLE IF NOT EXISTS grams ("
+            " gram TEXT NOT NULL, size INTEGER NOT NULL, id INTEGER NOT NULL,"
+            " PRIMARY KEY (gram, size, id)) WITHOUT ROWID;"
+        )
+        if rebuild:
+            db.executemany(
+                "INSERT INTO grams VALUES (?, ?, ?)",
+                sorted((gram, size, entry_id)
+                       for entry_id, name, size in db.execute("SELECT id, name, size FROM names").fetchall()
+                       for gram in trigrams(name))
+            )
+
+    def update(self, db: sqlite3.Connection, parent: str, children: Iterable[FileNode]) -> List[str]:
+        """Index a directory's current children in place of what was indexed for it.
+
+        Returns:
+            Paths of subdirectories that are gone; everything below them is dropped too
+        """
+        indexed = {
+            name: (entry_id, bool(is_dir), size)
+            for entry_id, name, is_dir, size in db.execute(
+                "SELECT id, name, is_dir, size FROM names WHERE parent = ?", (parent,)
+            )
+        }
+        stale, gone, resized, added = [], [], [], []  # stale: (id, name, size) to drop
+        for child in children:
+            size = child.total_size
+            current = indexed.pop(child.name, None)
+            if current is not None:
+                if current[1] == child.is_dir:
+                    if current[2] != size:
+                        resized.append((current[0], child.name, current[2], size))
+                    continue
+                stale.append((current[0], child.name, current[2]))
+                if current[1]:
+                    gone.append(child.path)
+            added.append((child.name, child.is_dir, size))
+        db.executemany("UPDATE names SET size = ? WHERE id = ?",
+                       ((size, entry_id) for entry_id, _, _, size in resized))
+        db.executemany(
+            "UPDATE grams SET size = ? WHERE gram = ? AND size = ? AND id = ?",
+            ((size, gram, old, entry_id) for entry_id, name, old, size in resized for gram in trigrams(name))
+        )
+
+        # Ids handed out here, so names and their grams go in as two bulk inserts
+        # (grams in key order, which keeps large listings from thrashing the b-tree)
+        next_id = db.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM names").fetchone()[0]
+        db.executemany(
+            "INSERT INTO names VALUES (?, ?, ?, ?, ?)",
+            ((next_id + i, parent, name, is_dir, size) for i, (name, is_dir, size) in enumerate(added))
+        )
+        db.executemany(
+            "INSERT INTO grams VALUES (?, ?, ?)",
+            sorted((gram, size, next_id + i)
+                   for i, (name, _, size) in enumerate(added) for gram in trigrams(name))
+        )
+
+        for name, (entry_id, is_dir, size) in indexed.items():
+            stale.append((entry_id, name, size))
+            if is_dir:
+                gone.append(os.path.join(parent, name))
+        for path in gone:
+            stale.extend(db.execute(
+                "SELECT id, name, size FROM names WHERE parent = ? OR (parent >= ? AND parent < ?)",
+                (path, *subtree_bounds(path))
+            ))
+        self._delete(db, stale)
+        return gone
+
+    @staticmethod
+    def _delete(db: sqlite3.Connection, entries: List[Tuple[int, str, int]]):
+        # Grams are found again from the name and size, so they need no index by id
+        db.executemany(
+            "DELETE FROM grams WHERE gram = ? AND size = ? AND id = ?",
+            ((gram, size, entry_id) for entry_id, name, size in entries for gram in trigrams(name))
+        )
+        db.executemany("DELETE FROM names WHERE id = ?", ((entry_id,) for entry_id, _, _ in entries))
+
+    def search(self, query: str) -> Iterator[List[Tuple[str, bool, int]]]:
+        """Stream (path, is_dir, size) of names containing query, largest first.
+
+        Matching ignores case. Each batch is one LIMITed step down a
+        size-ordered index (the rarest trigram's postings, or every name for
+        queries shorter than a trigram), so the first results cost the same
+        however many names match. Batches may be empty; a caller can stop
+        between them.
+        """
+        needle = query.lower()
+        grams = trigrams(needle)
+
+        # Batches may be fetched from different worker threads, one at a time
+        db = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        try:
+            if grams:
+                gram = min(grams, key=lambda g: self._posting_count(db, g))
+                sql = ("SELECT g.size, g.id, n.parent, n.name, n.is_dir FROM grams g"
+                       " JOIN names n ON n.id = g.id WHERE g.gram = ? {after}"
+                       " ORDER BY g.size DESC, g.id DESC LIMIT ?")
+                column, params = "g.", (gram,)
+            else:
+                sql = ("SELECT size, id, parent, name, is_dir FROM names WHERE 1 {after}"
+                       " ORDER BY size DESC, id DESC LIMIT ?")
+                column, params = "", ()
+
+            first = sql.format(after="")
+            rest = sql.format(after=f"AND ({column}size, {column}id) < (?, ?)")
+            rows = db.execute(first, (*params, SEARCH_BATCH_SIZE)).fetchall()
+            while rows:
+                yield [
+                    (os.path.join(parent, name), bool(is_dir), size)
+                    for size, _, parent, name, is_dir in rows
+                    if needle in name.lower()
+                ]
+                last_size, last_id = rows[-1][:2]
+                rows = db.execute(rest, (*params, last_size, last_id, SEARCH_BATCH_SIZE)).fetchall()
+        finally:
+            db.close()
+
+    @staticmethod
+    def _posting_count(db: sqlite3.Connection, gram: str) -> int:
+        """Length of a trigram's posting list, counted up to GRAM_COUNT_LIMIT."""
+        return db.execute(
+            "SELECT COUNT(*) FROM (SELECT 1 FROM grams WHERE gram = ? LIMIT ?)",
+            (gram, GRAM_COUNT_LIMIT)
+        ).fetchone()[0]
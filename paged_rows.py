@@ -0,0 +1,111 @@
+"""
+Paged Rows - Sortable, filterable (path, size) rows served a page at a time
+"""
+
+from array import array
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from disk_scanner import CompactPathList, FileNode
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; sorting falls back to sorted()
+    np = None
+
+# Rows handed to the table per fetch
+PAGE_SIZE = 200
+
+
+class PagedRows:
+    """(path, size) rows seen through an index array.
+
+    Sorting and filtering only rebuild the index array; paths stay in their
+    prefix-compressed list and are decoded only for the rows on a page.
+    A new view is built without touching the current one (so it can be built
+    in a worker thread) and swapped in with set_view.
+    """
+
+    def __init__(self, paths: Sequence[str], sizes: Optional[array] = None):
+        """Initialize from parallel sequences.
+
+        Args:
+            paths: File paths (usually a CompactPathList)
+            sizes: array('q') of sizes parallel to paths (-1 where unknown)
+        """
+        self.paths = paths
+        self.sizes = sizes if sizes is not None else array('q', [-1]) * len(paths)
+        self._size_order: Optional[array] = None
+        # (index array, sorted by size, lowercase needle), replaced as one value
+        self._state: Tuple[array, bool, str] = (array('I', range(len(paths))), False, "")
+
+    @classmethod
+    def from_files(cls, files: Iterable[FileNode]) -> 'PagedRows':
+        """Collect rows from FileNodes (e.g. node.iter_files(ext))."""
+        paths = CompactPathList()
+        sizes = array('q')
+        for file_node in files:
+            paths.append(file_node.path)
+            sizes.append(file_node.size)
+        return cls(paths, sizes)
+
+    @property
+    def view(self) -> array:
+        """Indices of the rows in the current view, in order."""
+        return self._state[0]
+
+    @property
+    def sort_by_size(self) -> bool:
+        """Whether the current view is ordered largest first."""
+        return self._state[1]
+
+    @property
+    def needle(self) -> str:
+        """Lowercase text the current view's paths contain ("" for all rows)."""
+        return self._state[2]
+
+    def __len__(self) -> int:
+        return len(self.view)
+
+    def page(self, start: int, count: int = PAGE_SIZE) -> List[Tuple[str, int]]:
+        """Get rows [start, start + count) of the current view."""
+        return [(self.paths[i], self.sizes[i]) for i in self.view[start:start + count]]
+
+    def build_view(self, by_size: bool, needle: str) -> Tuple[array, bool, str]:
+        """Build the view for a sort and filter, leaving the current view alone.
+
+        Rows are ordered by size (largest first) or kept in their original
+        order, then only those whose path contains needle (case-insensitive)
+        are kept. When only the needle changed and it extends the current one
+        (typing), just the rows that already matched are checked again.
+        """
+        view, sorted_now, needle_now = self._state
+        needle = needle.lower()
+        if by_size == sorted_now and needle == needle_now:
+            return self._state
+        if by_size == sorted_now and needle_now and needle_now in needle:
+            return self._filtered(view, needle), by_size, needle
+        return self._filtered(self._ordered(by_size), needle), by_size, needle
+
+    def set_view(self, state: Tuple[array, bool, str]):
+        """Show a view from build_view (on the thread that reads pages)."""
+        self._state = state
+
+    def _filtered(self, base: array, needle: str) -> array:
+        if not needle:
+            return base
+        paths = self.paths
+        return array('I', (i for i in base if needle in paths[i].lower()))
+
+    def _ordered(self, by_size: bool) -> array:
+        """Indices of all rows, by size or in original order (size order is cached)."""
+        if not by_size:
+            return array('I', range(len(self.paths)))
+        if self._size_order is None:
+            if np is not None and len(self.sizes):
+                order = np.argsort(-np.frombuffer(self.sizes, dtype=np.int64), kind='stable')
+                self._size_order = array('I', order.astype(np.uint32).tobytes())
+            else:
+                self._size_order = array(
+                    'I', sorted(range(len(self.paths)), key=self.sizes.__getitem__, reverse=True)
+                )
+        return self._size_order
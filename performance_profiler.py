@@ -3,12 +3,15 @@ Performance Profiling Script
 Measures improvements from architecture optimizations
 """
 
+import json
+import sys
 import time
 import os
 import psutil
 from pathlib import Path
 from disk_scanner import DiskScanner, FileNode
 from cache_manager import get_cache
+from tree_analytics import TreeColumns
 
 
 def format_size(bytes_val):
@@ -79,6 +82,19 @@ def profile_scan(path: str, use_cache: bool = True):
     print(f"  Average cached lookup: {avg_time:.3f}ms")
     print(f"  Speedup: {time1/avg_time:.0f}x faster!")
     
+    # Profile columnar analytics
+    print(f"\nProfiling columnar analytics...")
+    start = time.time()
+    columns = TreeColumns.from_node(root_node)
+    export_time = time.time() - start
+    start = time.time()
+    columns.extension_totals()
+    columns.depth_totals()
+    columns.subtree_totals()
+    query_time = time.time() - start
+    print(f"  Export: {export_time*1000:.2f}ms ({len(columns)} rows)")
+    print(f"  Extension/depth/subtree totals: {query_time*1000:.2f}ms")
+    
     # Save to cache
     if use_cache:
         print(f"\nSaving scan to cache...")
@@ -94,6 +110,7 @@ def profile_scan(path: str, use_cache: bool = True):
         'dirs': scanner.total_dirs,
         'stats_time': time1,
         'cached_stats_time': avg_time,
+        'columnar_query_time': query_time,
     }
 
 
@@ -124,6 +141,61 @@ def profile_cache_load(path: str):
         return None
 
 
+def flatten_metrics(metrics: dict, prefix: str = "") -> dict:
+    """Flatten nested metrics into {"expand_ms.1000": value} form."""
+    flat = {}
+    for key, value in metrics.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten_metrics(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare_results(baseline_path: str, current_path: str, threshold: float = 0.10):
+    """Compare two benchmark JSON files (e.g. from ui_benchmark.py).
+    
+    All metrics are times or memory, so lower is better; a metric that grew
+    by more than threshold is reported as a regression.
+    
+    Returns:
+        List of regressed metric names
+    """
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    with open(current_path) as f:
+        current = json.load(f)
+    
+    old = flatten_metrics(baseline.get('metrics', baseline))
+    new = flatten_metrics(current.get('metrics', current))
+    
+    print(f"\n{'='*70}")
+    print(f"Comparing {baseline_path} ({baseline.get('timestamp', '?')})")
+    print(f"     with {current_path} ({current.get('timestamp', '?')})")
+    print(f"{'='*70}")
+    print(f"{'Metric':<32}{'Baseline':>12}{'Current':>12}{'Change':>10}")
+    
+    regressions = []
+    for name in sorted(set(old) | set(new)):
+        before, after = old.get(name), new.get(name)
+        if before is None or after is None:
+            print(f"{name:<32}{before if before is not None else '-':>12}"
+                  f"{after if after is not None else '-':>12}{'n/a':>10}")
+            continue
+        change = (after - before) / before if before else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        elif change < -threshold:
+            flag = "  improved"
+        print(f"{name:<32}{before:>12.2f}{after:>12.2f}{change:>+10.1%}{flag}")
+    
+    print(f"\n{len(regressions)} regression(s) above {threshold:.0%}")
+    return regressions
+
+
 def main():
     """Run performance profiling."""
     print("\n" + "="*70)
@@ -176,4 +248,6 @@ def main():
 
 
 if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--compare":
+        sys.exit(1 if compare_results(sys.argv[2], sys.argv[3]) else 0)
     main()
@@ -0,0 +1,121 @@
+"""
+Prefetcher - Low-priority read-ahead of directories the user is likely to open next
+"""
+
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Iterable, Optional
+
+# Directory listings kept for instant expansion
+PREFETCH_CACHE_SIZE = 256
+
+# Seconds a prefetched listing is trusted before it is listed again
+PREFETCH_TTL = 30.0
+
+# Pause between background listings, so prefetching never saturates slow mounts
+PREFETCH_DELAY = 0.05
+
+
+class DirectoryPrefetcher:
+    """Lists queued directories one at a time, into a bounded LRU.
+
+    The queue holds only the latest guesses: each schedule() replaces it.
+    Foreground I/O (a real expansion or scan) drops the queue and pauses
+    prefetching until it finishes, so read-ahead never delays what the user
+    is waiting for. Everything runs on the event loop (list_entries moves the
+    listing itself off it), so no locking is needed.
+    """
+
+    def __init__(self, list_entries: Callable[[str], Awaitable[list]],
+                 cache_size: int = PREFETCH_CACHE_SIZE,
+                 ttl: float = PREFETCH_TTL, delay: float = PREFETCH_DELAY):
+        """Initialize the prefetcher.
+
+        Args:
+            list_entries: Coroutine function listing one directory off the event loop
+            cache_size: Maximum listings kept
+            ttl: Seconds a listing stays valid
+            delay: Seconds to wait between background listings
+        """
+        self.list_entries = list_entries
+        self.cache_size = cache_size
+        self.ttl = ttl
+        self.delay = delay
+        self._cache = OrderedDict()  # path -> (listed_at, entries); LRU ordered
+        self._queue = deque()
+        self._foreground = 0
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start the background loop (call from the running event loop)."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        """Stop the background loop and drop pending work."""
+        self._queue.clear()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def schedule(self, paths: Iterable[str]):
+        """Replace the pending queue with paths, most likely first."""
+        self._queue.clear()
+        for path in paths:
+            if path and self._fresh(path) is None and path not in self._queue:
+                self._queue.append(path)
+        if self._queue:
+            self._wakeup.set()
+
+    def pop(self, path: str) -> Optional[list]:
+        """Take a fresh prefetched listing out of the cache (None on a miss)."""
+        entries = self._fresh(path)
+        if entries is not None:
+            del self._cache[path]
+        return entries
+
+    @contextmanager
+    def foreground(self):
+        """Mark real I/O in progress: drop queued guesses and pause until it ends."""
+        self._foreground += 1
+        self._queue.clear()
+        self._idle.clear()
+        try:
+            yield
+        finally:
+            self._foreground -= 1
+            if not self._foreground:
+                self._idle.set()
+
+    def _fresh(self, path: str) -> Optional[list]:
+        entry = self._cache.get(path)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] > self.ttl:
+            del self._cache[path]
+            return None
+        return entry[1]
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            await self._idle.wait()
+            if not self._queue:
+                self._wakeup.clear()
+                continue
+
+            path = self._queue.popleft()
+            try:
+                entries = await self.list_entries(path)
+            except Exception:
+                continue
+            self._cache[path] = (time.monotonic(), entries)
+            self._cache.move_to_end(path)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            await asyncio.sleep(self.delay)
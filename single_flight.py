@@ -0,0 +1,80 @@
+"""
+Single Flight - Share one running blocking call per key and cancel the ones no longer wanted
+"""
+
+import asyncio
+import threading
+from typing import Any, Callable, Hashable
+
+# Blocking calls running in worker threads at once
+MAX_CONCURRENT_CALLS = 4
+
+
+class StaleRequest(Exception):
+    """Raised to every waiter of a call that was cancelled as no longer wanted."""
+
+
+class SingleFlight:
+    """In-flight table of blocking calls (e.g. directory listings), keyed by path.
+
+    Concurrent requests for the same key await one shared call instead of
+    starting their own. At most max_calls run in worker threads; the rest
+    wait for a slot, so calls cancelled while waiting never reach a thread.
+    A call cancelled while running is told so through its cancelled()
+    argument and keeps its slot until the thread has returned, so the pool
+    stays bounded. Everything except the call itself runs on the event loop.
+    """
+
+    def __init__(self, max_calls: int = MAX_CONCURRENT_CALLS):
+        self._flights = {}  # key -> asyncio.Task
+        self._slots = asyncio.Semaphore(max_calls)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._flights
+
+    async def run(self, key: Hashable, func: Callable[[Callable[[], bool]], Any]) -> Any:
+        """Run func(cancelled) in a worker thread, or join the call already running for key.
+
+        Raises:
+            StaleRequest: If the call was cancelled by cancel_except()
+        """
+        task = self._flights.get(key)
+        if task is None:
+            task = asyncio.create_task(self._call(func))
+            self._flights[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+        try:
+            # Shielded: one waiter being cancelled must not cancel the shared call
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if task.cancelled():
+                raise StaleRequest(key) from None
+            raise
+
+    def cancel_except(self, wanted: Callable[[Hashable], bool]) -> int:
+        """Cancel every in-flight call whose key is not wanted.
+
+        Returns:
+            Number of calls cancelled
+        """
+        stale = [key for key in self._flights if not wanted(key)]
+        for key in stale:
+            # Dropped right away: a new request for the key starts a fresh call
+            self._flights.pop(key).cancel()
+        return len(stale)
+
+    def _finished(self, key: Hashable, task: asyncio.Task):
+        if self._flights.get(key) is task:
+            del self._flights[key]
+
+    async def _call(self, func: Callable[[Callable[[], bool]], Any]) -> Any:
+        cancelled = threading.Event()
+        async with self._slots:
+            work = asyncio.ensure_future(asyncio.to_thread(func, cancelled.is_set))
+            try:
+                return await asyncio.shield(work)
+            except asyncio.CancelledError:
+                cancelled.set()
+                # Hold the slot until the thread stops
+                await asyncio.gather(work, return_exceptions=True)
+                raise
@@ -0,0 +1,136 @@
+"""
+Size Histogram - Fixed-width log2 file size histograms for directory aggregates
+"""
+
+from array import array
+from typing import Dict, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional
+    np = None
+
+# Bin 0 holds empty files; bin k holds sizes in [2**(k-1), 2**k).
+# 48 bins reach 128 TB, the last bin absorbs anything larger.
+SIZE_HISTOGRAM_BINS = 48
+
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+
+
+def size_bin(size: int) -> int:
+    """Get the log2 histogram bin for a file size."""
+    return min(size.bit_length(), SIZE_HISTOGRAM_BINS - 1)
+
+
+def new_histogram() -> array:
+    """Create an empty histogram (one unsigned 64-bit count per bin)."""
+    return array('Q', bytes(8 * SIZE_HISTOGRAM_BINS))
+
+
+def merge_histogram(target: array, source: array):
+    """Add source counts into target in place."""
+    for index, count in enumerate(source):
+        if count:
+            target[index] += count
+
+
+def bin_label(index: int) -> str:
+    """Get a short lower-bound label for a bin (e.g. '0B', '4KB')."""
+    if index == 0:
+        return "0B"
+    size = 1 << (index - 1)
+    for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
+        if size < 1024:
+            return f"{size}{unit}"
+        size //= 1024
+    return f"{size}PB"
+
+
+def sparkline(histogram: Sequence[int]) -> str:
+    """Render the non-empty span of a histogram as a sparkline with range labels."""
+    used = [i for i, count in enumerate(histogram) if count]
+    if not used:
+        return ""
+
+    first, last = used[0], used[-1]
+    peak = max(histogram[first:last + 1])
+    chars = []
+    for count in histogram[first:last + 1]:
+        if not count:
+            chars.append(" ")
+        else:
+            chars.append(SPARK_CHARS[count * (len(SPARK_CHARS) - 1) // peak])
+
+    upper = bin_label(last + 1) if last + 1 < SIZE_HISTOGRAM_BINS else "+"
+    return f"{bin_label(first)} {''.join(chars)} {upper}"
+
+
+def build_directory_histograms(sizes, parents, depths, is_dir) -> Dict[int, Sequence[int]]:
+    """Build subtree size histograms for every directory of an array-backed tree.
+
+    Args:
+        sizes: File size per node
+        parents: Parent node index per node (-1 for the root)
+        depths: Depth per node (root is 0)
+        is_dir: Directory flag per node
+
+    Returns:
+        Mapping of directory node index -> histogram counts
+
+    With NumPy this is a handful of vectorized operations: one bincount for
+    the direct files and one scatter-add per tree level to roll children up.
+    """
+    if np is None:
+        return _build_directory_histograms_py(sizes, parents, depths, is_dir)
+
+    sizes = np.asarray(sizes, dtype=np.int64)
+    parents = np.asarray(parents, dtype=np.int64)
+    depths = np.asarray(depths, dtype=np.int64)
+    is_dir = np.asarray(is_dir, dtype=bool)
+
+    dir_index = np.flatnonzero(is_dir)
+    if dir_index.size == 0:
+        return {}
+    # Row of each directory in the histogram matrix
+    dir_row = np.full(sizes.shape[0], -1, dtype=np.int64)
+    dir_row[dir_index] = np.arange(dir_index.size)
+
+    # Direct files: bin = bit_length(size) (frexp's exponent), clipped to the last bin
+    files = np.flatnonzero(~is_dir & (parents >= 0))
+    bins = np.frexp(sizes[files].astype(np.float64))[1].astype(np.int64)
+    np.minimum(bins, SIZE_HISTOGRAM_BINS - 1, out=bins)
+    flat = dir_row[parents[files]] * SIZE_HISTOGRAM_BINS + bins
+    hist = np.bincount(
+        flat, minlength=dir_index.size * SIZE_HISTOGRAM_BINS
+    ).reshape(dir_index.size, SIZE_HISTOGRAM_BINS)
+
+    # Roll child directories into parents, deepest level first
+    child_dirs = dir_index[parents[dir_index] >= 0]
+    child_depths = depths[child_dirs]
+    for depth in range(int(child_depths.max(initial=0)), 0, -1):
+        level = child_dirs[child_depths == depth]
+        np.add.at(hist, dir_row[parents[level]], hist[dir_row[level]])
+
+    return {int(node): hist[row] for row, node in enumerate(dir_index)}
+
+
+def _build_directory_histograms_py(sizes, parents, depths, is_dir) -> Dict[int, Sequence[int]]:
+    """Pure-Python fallback for build_directory_histograms."""
+    histograms = {i: new_histogram() for i, flag in enumerate(is_dir) if flag}
+    for i, flag in enumerate(is_dir):
+        if not flag and parents[i] >= 0:
+            histograms[parents[i]][size_bin(int(sizes[i]))] += 1
+
+    for node in sorted(histograms, key=lambda i: depths[i], reverse=True):
+        parent = parents[node]
+        if parent >= 0:
+            merge_histogram(histograms[parent], histograms[node])
+    return histograms
+
+
+def histogram_from_sizes(sizes, histogram: Optional[array] = None) -> array:
+    """Count a batch of file sizes into a (new or existing) histogram."""
+    histogram = histogram if histogram is not None else new_histogram()
+    for size in sizes:
+        histogram[size_bin(size)] += 1
+    return histogram
@@ -0,0 +1,76 @@
+"""
+Sparse Files - Map the data regions of a file with SEEK_DATA/SEEK_HOLE
+"""
+
+import errno
+import os
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+# Stop mapping after this many data regions (heavily fragmented files)
+MAX_EXTENTS = 4096
+
+
+@dataclass
+class ExtentMap:
+    """Data regions of a file; everything between them is a hole."""
+    size: int
+    extents: List[Tuple[int, int]] = field(default_factory=list)  # (offset, length)
+    truncated: bool = False  # True if MAX_EXTENTS was reached before the end
+
+    @property
+    def data_bytes(self) -> int:
+        """Bytes inside data regions."""
+        return sum(length for _, length in self.extents)
+
+    @property
+    def hole_bytes(self) -> int:
+        """Bytes inside holes (only exact when the map is not truncated)."""
+        return self.size - self.data_bytes
+
+    def bar(self, width: int = 48) -> str:
+        """Render the file as cells: '█' where a cell holds any data, '·' for pure holes."""
+        if self.size <= 0 or width <= 0:
+            return ""
+        cells = ['·'] * width
+        for offset, length in self.extents:
+            first = offset * width // self.size
+            last = min(width - 1, (offset + length - 1) * width // self.size)
+            for cell in range(first, last + 1):
+                cells[cell] = '█'
+        return "".join(cells)
+
+
+def data_extents(path: str, max_extents: int = MAX_EXTENTS) -> Optional[ExtentMap]:
+    """Map a file's data regions with lseek(SEEK_DATA/SEEK_HOLE).
+
+    Returns None where the platform has no SEEK_DATA (e.g. Windows) or the
+    filesystem rejects it. Filesystems without hole tracking report the whole
+    file as a single data region.
+    """
+    if not hasattr(os, 'SEEK_DATA'):
+        return None
+
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        size = os.fstat(fd).st_size
+        extent_map = ExtentMap(size=size)
+        offset = 0
+        while offset < size:
+            if len(extent_map.extents) >= max_extents:
+                extent_map.truncated = True
+                break
+            try:
+                start = os.lseek(fd, offset, os.SEEK_DATA)
+            except OSError as e:
+                if e.errno == errno.ENXIO:  # Only a trailing hole is left
+                    break
+                if e.errno == errno.EINVAL:
+                    return None
+                raise
+            end = os.lseek(fd, start, os.SEEK_HOLE)
+            extent_map.extents.append((start, end - start))
+            offset = end
+        return extent_map
+    finally:
+        os.close(fd)
@@ -0,0 +1,58 @@
+"""
+Deep Analysis Tests - Files over the Copilot upload limit still get their data/hole map
+"""
+
+import asyncio
+
+import pytest
+from textual.app import App
+from textual.widgets import Static, Tree
+
+import cache_manager
+from copilot_analyzer import CopilotBinaryAnalyzer
+from sparse_files import data_extents
+from textual_ui import COPILOT_UPLOAD_LIMIT, DiskVisualizerApp
+
+
+def test_oversized_file_shows_extent_map(tmp_path, monkeypatch):
+    root = tmp_path / "data"
+    root.mkdir()
+    image = root / "disk.img"
+    with open(image, "wb") as f:
+        f.write(b"boot" * 1024)
+        f.truncate(64 * 1024 * 1024)  # Sparse: one data region, then a hole
+    assert image.stat().st_size > COPILOT_UPLOAD_LIMIT
+    if data_extents(str(image)) is None:
+        pytest.skip("SEEK_DATA is not supported here")
+
+    monkeypatch.setattr(cache_manager, "_cache_instance", cache_manager.ScanCache(tmp_path / "cache"))
+
+    def no_upload(*args):
+        raise AssertionError("an oversized file was sent for analysis")
+    monkeypatch.setattr(CopilotBinaryAnalyzer, "analyze_file_contents", no_upload)
+
+    class Harness(App):
+        def on_mount(self):
+            self.push_screen(DiskVisualizerApp(str(root)))
+
+    async def run():
+        app = Harness()
+        async with app.run_test() as pilot:
+            screen = app.screen
+            tree = screen.query_one("#file-tree", Tree)
+            while not any(child.data is not None and child.data.name == "disk.img"
+                          for child in tree.root.children):
+                await pilot.pause(0.05)
+            screen.selected_node = next(child.data for child in tree.root.children
+                                        if child.data.name == "disk.img")
+
+            screen.action_deep_analyze()
+            await pilot.pause(0.05)
+            await app.workers.wait_for_complete()
+            await pilot.pause(0.05)
+            return str(screen.query_one("#deep-analysis-panel", Static).renderable)
+
+    panel = asyncio.run(run())
+    assert "Data Regions" in panel
+    assert "1 regions" in panel
+    assert "too large for Copilot" in panel
@@ -5,16 +5,70 @@ Split-view interface with file tree on left and statistics on right.
 
 from textual.app import ComposeResult
 from textual.containers import Horizontal, Vertical, VerticalScroll
-from textual.widgets import Header, Footer, Static, Tree, DataTable, Label, ProgressBar
+from textual.widgets import Header, Footer, Static, Tree, DataTable, Label, ProgressBar, Input
 from textual.screen import Screen
 from rich.text import Text
+from dataclasses import dataclass
+from array import array
+from itertools import islice
+from typing import Callable
 import asyncio
+import heapq
 import os
+import threading
+import time
+import weakref
+from collections import deque
 
-from disk_scanner import DiskScanner, FileNode
+try:
+    import grp
+    import pwd
+except ImportError:  # Not available on Windows
+    grp = None
+    pwd = None
+
+from disk_scanner import AGE_BUCKET_DAYS, CompactPathList, DiskScanner, FileNode, make_file_node, measure_tree
 from file_type_analyzer import FileTypeAnalyzer
 from copilot_analyzer import CopilotBinaryAnalyzer
 from cache_manager import get_cache
+from compress_estimator import CompressionEstimator
+from content_sniffer import ContentSniffer
+from sparse_files import data_extents
+from duplicate_finder import DuplicateFinder
+from paged_rows import PAGE_SIZE, PagedRows
+from prefetcher import DirectoryPrefetcher
+from single_flight import SingleFlight, StaleRequest
+from ui_updates import UI_UPDATE_RATE, UpdateQueue
+from size_histogram import sparkline
+from tree_query import QueryError, TreeQuery
+
+# Matches pulled from the query evaluator per UI update
+FILTER_BATCH_SIZE = 256
+# Maximum matching files added to the filtered tree (stats still count all)
+FILTER_TREE_LIMIT = 5000
+# Children added to the tree per page; the rest wait behind a "show next" node
+TREE_PAGE_SIZE = 200
+# Read-ahead guesses: rows below the cursor and largest sibling directories
+PREFETCH_AHEAD = 5
+PREFETCH_SIBLINGS = 3
+# Directories measured concurrently by background sizing
+SIZING_WORKERS = 4
+# Seconds between saves of a grown tree to the scan cache
+CACHE_SAVE_INTERVAL = 5.0
+# Maximum name search results listed in the paths table
+SEARCH_RESULT_LIMIT = 1000
+# Largest file uploaded for Copilot deep analysis, and bytes read per progress step
+COPILOT_UPLOAD_LIMIT = 5 * 1024 * 1024
+DEEP_ANALYSIS_READ_CHUNK = 256 * 1024
+
+
+@dataclass
+class TreePage:
+    """Data of a "show next" tree node: the children of a directory not shown yet."""
+    children: list  # All children of the directory, in display order
+    start: int  # Index of the first child not added yet
+    add_child: Callable  # (tree_node, child) -> None, adds one child node
+    size_of: Callable  # child -> bytes, for the summary of the rest
 
 
 class DiskVisualizerApp(Screen):
@@ -26,6 +80,18 @@ class DiskVisualizerApp(Screen):
         ("s", "show_stats", "Stats"),
         ("a", "analyze", "Analyze"),
         ("d", "deep_analyze", "Deep Analysis"),
+        ("x", "cancel_deep_analysis", "Cancel Analysis"),
+        ("l", "show_largest", "Largest Files"),
+        ("c", "show_cold_data", "Cold Data"),
+        ("u", "find_duplicates", "Duplicates"),
+        ("i", "find_duplicate_dirs", "Identical Dirs"),
+        ("I", "verify_duplicate_dirs", "Verify Dirs"),
+        ("o", "show_owners", "Owners"),
+        ("t", "show_content_types", "Content Types"),
+        ("z", "estimate_compression", "Compressibility"),
+        ("slash", "focus_filter", "Filter"),
+        ("f", "focus_search", "Find"),
+        ("S", "sort_paths", "Sort Paths"),
         ("enter", "select_tree_node", "Select"),
     ]
     
@@ -42,7 +108,32 @@ class DiskVisualizerApp(Screen):
         self.scan_progress = 0
         self.scan_total = 100
         self.extension_data = {}
+        self.stats_source_node = None  # FileNode whose subtree backs extension_data
         self.tree_nodes_map = {}
+        self._filter_generation = 0  # Bumped per filter run so stale runs stop streaming
+        self.paths_rows = None  # PagedRows behind the paths table (None for feature views)
+        self._paths_loaded = 0  # Rows of paths_rows already added to the table
+        self._paths_title = ""  # Header prefix of the current paths listing
+        self._sort_paths_by_size = False  # Sort order chosen for paths listings
+        self._paths_filter_generation = 0  # Bumped per paths filter change
+        self._search_generation = 0  # Bumped per keystroke in the search box
+        self._showing_search = False  # Paths table lists name search results
+        self._deep_analysis_queue = deque()  # FileNodes waiting for deep analysis
+        self._deep_analysis_current = None  # FileNode whose deep analysis worker is running
+        self._stats_generation = 0  # Bumped per stats request so stale workers stop
+        self._listing_mtimes = {}  # path -> directory st_mtime_ns when it was last listed
+        self.directory_loads = SingleFlight()  # In-flight directory listings, keyed by path
+        self.prefetcher = DirectoryPrefetcher(self._list_directory)
+        self._sizing_generation = 0  # Bumped when the tree is rebuilt so old sizing stops
+        self.ui_updates = UpdateQueue()  # Widget changes from workers, applied per frame
+        self.snapshot = None  # ScanSnapshot of drive_path: listings saved by earlier sessions
+        self._dirty_listings = {}  # id -> listed FileNode whose saved row is out of date
+        self._cache_saving = False
+        self._measuring = set()  # ids of FileNodes being measured by background sizing
+        self._revalidation_slots = asyncio.Semaphore(SIZING_WORKERS)
+        self._revalidating = 0  # Snapshot listings and sizes still being re-checked
+        self._showing_snapshot = False  # Title says the tree is a stale snapshot
+        self._moved_tree_nodes = weakref.WeakKeyDictionary()  # TreeNode -> node re-added in its place
         self.title = f"Disk Octopus | {self.drive_path}"
         self._scan_count = 0  # Track items scanned
         
@@ -55,6 +146,11 @@ class DiskVisualizerApp(Screen):
             # Left panel: File tree
             with Vertical(id="left-panel"):
                 yield Label("[bold][ Directory Tree ][/bold]", id="tree-header")
+                yield Input(
+                    placeholder="Filter: ext in (.log,.gz) and size > 100M and mtime < 30d",
+                    id="filter-input"
+                )
+                yield Input(placeholder="Find by name (f)", id="search-input")
                 yield Tree(self.drive_path, id="file-tree")
             
             # Right panel: Statistics, Analysis, and paths
@@ -64,6 +160,7 @@ class DiskVisualizerApp(Screen):
                     # Statistics panel
                     with Vertical(id="stats-section"):
                         yield Label("[bold][ File Statistics ][/bold]", id="stats-header")
+                        yield Static("", id="stats-sparkline")
                         yield DataTable(id="stats-table")
                     
                     # Copilot Analysis panel (scrollable)
@@ -77,6 +174,7 @@ class DiskVisualizerApp(Screen):
                     # File paths grid
                     with Vertical(id="paths-section"):
                         yield Label("[bold][ File Paths ][/bold]", id="paths-header")
+                        yield Input(placeholder="Filter paths (S: sort by size)", id="paths-filter")
                         yield DataTable(id="paths-table")
                     
                     # Deep Analysis Results
@@ -99,6 +197,14 @@ class DiskVisualizerApp(Screen):
         self.setup_paths_table()
         self.setup_file_tree()
         
+        self.prefetcher.start()
+        self.set_interval(1 / UI_UPDATE_RATE, self._flush_ui_updates)
+        self.set_interval(CACHE_SAVE_INTERVAL, self._save_tree_to_cache)
+        
+        # Fetch more paths rows as the table is scrolled towards its end
+        self.watch(self.query_one("#paths-table", DataTable), "scroll_y",
+                   self._on_paths_scroll, init=False)
+        
         # Focus the tree
         tree = self.query_one("#file-tree", Tree)
         tree.focus()
@@ -106,6 +212,35 @@ class DiskVisualizerApp(Screen):
         # Now start the scan
         await self.start_scan()
     
+    def _flush_ui_updates(self) -> None:
+        """Apply all queued widget changes as one batch and refresh once."""
+        if self.ui_updates.drain():
+            self.refresh()
+    
+    def on_unmount(self) -> None:
+        """Stop background read-ahead and save what was explored since the last save."""
+        self.prefetcher.stop()
+        if self._dirty_listings and self.snapshot is not None:
+            self.snapshot.save_listings(list(self._dirty_listings.values()))
+    
+    def _mark_dirty(self, node: FileNode) -> None:
+        """Queue a listed directory's row for saving, with its ancestors' (they hold its total)."""
+        while node is not None:
+            self._dirty_listings[id(node)] = node
+            node = node.parent
+    
+    async def _save_tree_to_cache(self) -> None:
+        """Save changed directory listings to the snapshot in the background."""
+        if not self._dirty_listings or self._cache_saving or self.snapshot is None:
+            return
+        nodes = list(self._dirty_listings.values())
+        self._dirty_listings.clear()
+        self._cache_saving = True
+        try:
+            await asyncio.to_thread(self.snapshot.save_listings, nodes)
+        finally:
+            self._cache_saving = False
+    
     def setup_stats_table(self) -> None:
         """Configure the statistics table."""
         table = self.query_one("#stats-table", DataTable)
@@ -121,7 +256,7 @@ class DiskVisualizerApp(Screen):
         """Configure the file paths table."""
         try:
             table = self.query_one("#paths-table", DataTable)
-            table.add_columns("File Path")
+            table.add_columns("File Path", "Size")
         except:
             pass  # Table may not exist yet
         
@@ -136,7 +271,15 @@ class DiskVisualizerApp(Screen):
         tree.root.label = root_label
     
     async def start_scan(self) -> None:
-        """Start disk scan - load first level folders only. Uses cache if available."""
+        """Show the drive's tree, starting from the last snapshot if there is one.
+        
+        Everything is one FileNode tree rooted at root_node: directories are
+        listed into it as they are expanded and their listings are saved to
+        the snapshot as it grows. Listings found in the snapshot are shown at
+        once, marked stale, and re-checked in the background (stale while
+        revalidate); only the directories being shown are ever read, so the
+        first paint does not depend on the size of the drive.
+        """
         self.scanning = True
         self._scan_count = 0
         
@@ -144,133 +287,363 @@ class DiskVisualizerApp(Screen):
             tree = self.query_one("#file-tree", Tree)
             progress_bar = self.query_one("#progress-bar", ProgressBar)
             
-            # Try to load from cache first
+            # Try the tree in memory, then the cache
             self.title = f"Disk Octopus | Checking cache..."
             progress_bar.progress = 25
-            self.refresh()
+            self.ui_updates.request_refresh()
             await asyncio.sleep(0)
             
-            cached_node = await asyncio.to_thread(
-                self.cache.load_scan, self.drive_path
-            )
-            
-            if cached_node:
-                # Use cached data!
-                self.title = f"Disk Octopus | Loaded from cache..."
-                progress_bar.progress = 50
-                self.refresh()
-                await asyncio.sleep(0)
-                
-                self.root_node = cached_node
-                await self._populate_tree_from_node(tree.root, cached_node)
-                
-                self.scanning = False
-                progress_bar.progress = 100
-                self.title = f"Disk Octopus | {self.drive_path} | Ready (cached)"
-                self.refresh()
-                return
+            root_node = self.root_node
+            if root_node is None:
+                self.snapshot = await asyncio.to_thread(self.cache.snapshot, self.drive_path)
+                root_node = FileNode(name=self.drive_path, path=self.drive_path, is_dir=True)
+            self.root_node = root_node
             
-            # No cache, do full scan
             self.title = f"Disk Octopus | Loading first level..."
-            progress_bar.progress = 0
+            progress_bar.progress = 50
             tree.clear()
             root = tree.root
-            root.label = f"[D] {self.drive_path}"
-            self.refresh()
+            root.data = root_node
+            root.label = self.format_tree_root_label(self.drive_path)
+            self.ui_updates.request_refresh()
             await asyncio.sleep(0)
             
-            # Get first level entries in background using simple os.listdir
-            entries = await asyncio.to_thread(
-                self._get_first_level_entries, self.drive_path
-            )
+            # List the first level unless the tree or the snapshot already has it
+            await self._load_directory(root_node)
             
             # Populate tree on main thread
-            if entries:
-                root.data = {"path": self.drive_path, "is_dir": True}
-                root.label = f"[D] {self.drive_path}"
-                
-                for entry_name, entry_path, is_dir, size in entries:
-                    icon = "[d]" if is_dir else "[f]"
-                    size_str = self.format_size(size) if size > 0 else ""
-                    label = f"{icon} {entry_name:<30} {size_str:>10}"
-                    
-                    tree_node = root.add(label)
-                    tree_node.data = {"path": entry_path, "name": entry_name, "is_dir": is_dir, "size": size, "scanned": False}
-                    
-                    # Add placeholder for directories
-                    if is_dir:
-                        tree_node.add("[...]")
-                
-                # Expand the root node to show children
-                root.expand()
-                self.refresh()
-            
-            # Save to cache for next time
-            if self.root_node:
-                await asyncio.to_thread(
-                    self.cache.save_scan, self.drive_path, self.root_node
-                )
+            self._sizing_generation += 1
+            await self._populate_tree_node(root, root_node)
+            
+            # Expand the root node to show children
+            root.expand()
             
-            # Complete
+            # Complete; a snapshot stays marked until it has been re-checked
             self.scanning = False
             progress_bar.progress = 100
             self.title = f"Disk Octopus | {self.drive_path} | Ready"
-            self.refresh()
+            if root_node.is_stale:
+                saved = await asyncio.to_thread(self.snapshot.saved_at)
+                self._showing_snapshot = True
+                self.title = (f"Disk Octopus | {self.drive_path} | Snapshot from "
+                              f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(saved or 0))}, revalidating...")
+            self._after_populate(root)
+            self.ui_updates.request_refresh()
             
         except Exception as e:
             self.scanning = False
             self.title = f"Disk Octopus | ERROR"
-            self.refresh()
+            self.ui_updates.request_refresh()
             self.notify(f"Error: {str(e)[:50]}", severity="error")
     
-    def _get_first_level_entries(self, path: str) -> list:
-        """Get first-level directory entries as (name, path, is_dir, size) tuples."""
-        entries = []
+    async def _populate_tree_node(self, tree_node, file_node: FileNode) -> None:
+        """Populate a tree node with the first page of its children.
+        
+        Deeper levels are added when their directory is expanded, so the cost
+        does not depend on the size of the subtree.
+        """
+        if not file_node.children:
+            return
+        
+        self._add_children_paged(tree_node, self._sorted_children(file_node),
+                                 self._add_file_node, lambda c: c.total_size)
+    
+    @staticmethod
+    def _sorted_children(file_node: FileNode) -> list:
+        """Children of a FileNode: directories not measured yet first, then largest first.
+        
+        Unmeasured directories lead so paging never hides them behind files.
+        """
+        return sorted(
+            file_node.children,
+            key=lambda x: (not DiskVisualizerApp._size_pending(x), -x.total_size, x.name)
+        )
+    
+    @staticmethod
+    def _size_pending(node: FileNode) -> bool:
+        """Whether a directory's size is unknown: neither listed nor measured yet."""
+        return node.is_dir and not node.is_scanned and node.measured_size < 0
+    
+    @staticmethod
+    def _needs_measuring(node: FileNode) -> bool:
+        """Whether an unlisted directory's subtree size is unknown or only from a snapshot."""
+        return node.is_dir and not node.is_scanned and (node.measured_size < 0 or node.is_stale)
+    
+    def _add_file_node(self, tree_node, child: FileNode) -> None:
+        """Add a FileNode child; directories get a placeholder until expanded."""
+        new_tree_node = tree_node.add(self.format_node_label(child), data=child)
+        if child.is_dir and (child.children or not child.is_scanned):
+            new_tree_node.add_leaf("[...]", data=None)
+    
+    def _partial_label(self, node: FileNode, size: int) -> Text:
+        """Dimmed label with the running total of a directory still being measured."""
+        # Text: keep "[d]" from parsing as markup
+        return Text(f"[d] {node.name:<35} {self.format_size(size):>10}", style="dim")
+    
+    def _after_populate(self, tree_node) -> None:
+        """Start background work for a directory whose children were just shown.
+        
+        Unmeasured and snapshot-sized subdirectories are measured, and a
+        listing taken from the snapshot is re-read from disk.
+        """
+        self._start_sizing(tree_node)
+        file_node = tree_node.data
+        if isinstance(file_node, FileNode) and file_node.is_stale and id(file_node) not in self._measuring:
+            self._measuring.add(id(file_node))
+            asyncio.create_task(self._revalidate_listing(tree_node))
+    
+    def _start_sizing(self, tree_node) -> None:
+        """Measure the subtrees of tree_node's unmeasured directory children in the background."""
+        pending = [
+            child for child in tree_node.children
+            if isinstance(child.data, FileNode) and self._needs_measuring(child.data)
+            and id(child.data) not in self._measuring
+        ]
+        if pending:
+            self._measuring.update(id(child.data) for child in pending)
+            asyncio.create_task(self._size_directories(tree_node, pending, self._sizing_generation))
+    
+    async def _size_directories(self, parent, nodes: list, generation: int) -> None:
+        """Stream subtree sizes into labels as they are measured, then re-sort the siblings.
+        
+        Running totals are posted from the worker threads; the update queue
+        keeps only the latest label per node. The shown order stays put while
+        sizing runs and is re-sorted once at the end. Directories sized by a
+        snapshot keep that size on screen until the new one is final.
+        Measured sizes are saved with the parent's listing.
+        """
+        semaphore = asyncio.Semaphore(SIZING_WORKERS)
+        cancelled = lambda: generation != self._sizing_generation
+        
+        def post_label(node, size):
+            label = self._partial_label(node.data, size)
+            self.ui_updates.post(lambda: self._live_tree_node(node).set_label(label), key=("label", id(node)))
+        
+        async def size_one(node):
+            file_node = node.data
+            stale = file_node.is_stale
+            self._revalidating += stale
+            try:
+                async with semaphore:
+                    if cancelled():
+                        return
+                    result = await asyncio.to_thread(
+                        measure_tree, file_node.path, cancelled,
+                        None if stale else lambda size, files: post_label(node, size)
+                    )
+                if result is None or cancelled():
+                    return
+                file_node.measured_size = result[0]
+                file_node.is_stale = False
+                file_node.invalidate_size_cache()
+                if file_node.parent is not None:
+                    self._mark_dirty(file_node.parent)
+                self.ui_updates.post(lambda: self._live_tree_node(node).set_label(self.format_node_label(file_node)),
+                                     key=("label", id(node)))
+                self.ui_updates.post(lambda: self._refresh_ancestor_labels(parent),
+                                     key=("ancestors", id(parent)))
+            finally:
+                self._measuring.discard(id(file_node))
+                self._revalidating -= stale
+                self._check_revalidated()
+        
+        await asyncio.gather(*(size_one(node) for node in nodes), return_exceptions=True)
+        if not cancelled():
+            # Also catches labels of nodes a re-sort collapsed to a placeholder and listed again
+            self.ui_updates.post(lambda: self._refresh_child_labels(parent), key=("children", id(parent)))
+            self.ui_updates.post(lambda: self._sort_children_by_size(parent), key=("sort", id(parent)))
+    
+    async def _revalidate_listing(self, tree_node) -> None:
+        """Re-read a directory shown from the snapshot and patch the differences in."""
+        file_node = tree_node.data
+        self._revalidating += 1
         try:
-            for entry in os.listdir(path):
-                try:
-                    full_path = os.path.join(path, entry)
-                    
-                    if os.path.islink(full_path):
-                        continue
-                    
-                    is_dir = os.path.isdir(full_path)
-                    size = 0
-                    
-                    if is_dir:
-                        # Don't calculate folder size - just mark as directory
-                        size = 0
-                    else:
-                        try:
-                            size = os.path.getsize(full_path)
-                        except:
-                            size = 0
-                    
-                    entries.append((entry, full_path, is_dir, size))
-                except:
-                    pass
-        except:
+            async with self._revalidation_slots:
+                fresh = await asyncio.to_thread(self._list_children, file_node.path)
+            tree_node = self._live_tree_node(tree_node)
+            added, removed = self._merge_listing(file_node, fresh)
+            self._mark_dirty(file_node)
+            self._patch_tree_children(tree_node, added, removed)
+            self.ui_updates.post(lambda: self._refresh_child_labels(tree_node), key=("children", id(tree_node)))
+            self.ui_updates.post(lambda: self._refresh_ancestor_labels(tree_node),
+                                 key=("ancestors", id(tree_node)))
+            self._start_sizing(tree_node)
+        except Exception:
             pass
+        finally:
+            self._measuring.discard(id(file_node))
+            self._revalidating -= 1
+            self._check_revalidated()
+    
+    @staticmethod
+    def _merge_listing(node: FileNode, fresh: list):
+        """Patch a fresh listing into a directory's children, keeping nodes that still exist.
         
-        # Sort by name
-        entries.sort(key=lambda x: x[0])
-        return entries
+        Files take the new size and times; existing subdirectories keep their
+        own listing (they are re-checked when shown). Clears the stale marks.
+        
+        Returns:
+            (added, removed) child FileNodes
+        """
+        old = {child.name: child for child in node.children}
+        merged, added = [], []
+        changed = False
+        for new in fresh:
+            current = old.pop(new.name, None)
+            if current is None or current.is_dir != new.is_dir:
+                new.parent = node
+                merged.append(new)
+                added.append(new)
+                continue
+            if not current.is_dir:
+                if (current.size, current.mtime, current.blocks) != (new.size, new.mtime, new.blocks):
+                    for field in ('size', 'mtime', 'atime', 'dev', 'inode', 'uid', 'gid', 'blocks'):
+                        setattr(current, field, getattr(new, field))
+                    current.invalidate_size_cache()
+                    changed = True
+                current.is_stale = False
+            merged.append(current)
+        removed = list(old.values())
+        
+        if changed or added or removed:
+            node.children = merged
+            node.invalidate_size_cache()
+            node.invalidate_stats_cache()
+        node.is_stale = False
+        return added, removed
     
-    async def _populate_tree_node(self, tree_node, file_node: FileNode) -> None:
-        """Recursively populate a tree node with children."""
-        if not file_node.children:
+    def _patch_tree_children(self, tree_node, added: list, removed: list) -> None:
+        """Apply added and removed children to a directory's shown tree nodes."""
+        if (not added and not removed) or self._has_placeholder(tree_node):
+            return  # Not shown yet: expanding it shows the merged listing
+        removed_ids = {id(child) for child in removed}
+        for child in list(tree_node.children):
+            if isinstance(child.data, FileNode) and id(child.data) in removed_ids:
+                child.remove()
+            elif isinstance(child.data, TreePage):
+                page = child.data
+                page.start -= sum(1 for c in page.children[:page.start] if id(c) in removed_ids)
+                page.children = [c for c in page.children if id(c) not in removed_ids]
+        for child in added:
+            self._add_file_node(tree_node, child)
+        self.ui_updates.post(lambda: self._sort_children_by_size(tree_node), key=("sort", id(tree_node)))
+    
+    def _refresh_child_labels(self, tree_node) -> None:
+        """Rebuild the labels of a directory's shown children."""
+        tree_node = self._live_tree_node(tree_node)
+        for child in tree_node.children:
+            if isinstance(child.data, FileNode) and id(child.data) not in self._measuring:
+                child.set_label(self.format_node_label(child.data))
+    
+    def _refresh_ancestor_labels(self, tree_node) -> None:
+        """Rebuild the labels of a node and its ancestors, whose totals include it."""
+        tree_node = self._live_tree_node(tree_node)
+        while tree_node is not None and not tree_node.is_root:
+            if isinstance(tree_node.data, FileNode):
+                tree_node.set_label(self.format_node_label(tree_node.data))
+            tree_node = tree_node.parent
+    
+    def _check_revalidated(self) -> None:
+        """Drop the snapshot mark from the title once everything shown was re-checked."""
+        if self._showing_snapshot and not self._revalidating:
+            self._showing_snapshot = False
+            self.title = f"Disk Octopus | {self.drive_path} | Ready"
+    
+    def _live_tree_node(self, tree_node):
+        """The tree node now standing for tree_node.
+        
+        Re-sorting re-creates a directory's child nodes, so work that holds a
+        node across an await or a frame looks up its replacement here.
+        """
+        while tree_node in self._moved_tree_nodes:
+            tree_node = self._moved_tree_nodes[tree_node]
+        return tree_node
+    
+    def _sort_children_by_size(self, tree_node) -> None:
+        """Re-order tree_node's children like _sorted_children, keeping any "show next" node last.
+        
+        Tree has no reorder API, so when the order changed the direct children
+        are removed and added back in order. Collapsed directories come back
+        with a placeholder and list again when expanded; only what is shown
+        under expanded ones is carried over. The cursor is put back on the
+        node it was on.
+        """
+        def order(child):
+            data = child.data
+            if isinstance(data, FileNode):
+                return 0, not self._size_pending(data), -data.total_size, data.name
+            return 1,  # "show next" node
+        
+        tree_node = self._live_tree_node(tree_node)
+        children = list(tree_node.children)
+        ordered = sorted(children, key=order)
+        if all(old is new for old, new in zip(children, ordered)):
             return
         
-        for child in sorted(file_node.children, key=lambda x: x.total_size if x.is_dir else x.size, reverse=True):
-            label = self.format_node_label(child)
-            new_tree_node = tree_node.add(label, data=child)
-            
-            # Yield to UI
-            await asyncio.sleep(0)
-            
-            # Recurse
-            if child.is_dir and child.children:
-                await self._populate_tree_node(new_tree_node, child)
+        tree = tree_node.tree
+        cursor = tree.cursor_node
+        shapes = [self._node_shape(child) for child in ordered]
+        tree_node.remove_children()
+        replaced = {}  # Old TreeNode -> the node added in its place
+        for shape in shapes:
+            self._add_node_shape(tree_node, shape, replaced)
+        self._moved_tree_nodes.update(replaced)
+        if cursor in replaced:
+            # Line numbers of the new nodes are only known after the next refresh
+            tree.call_after_refresh(tree.select_node, replaced[cursor])
+    
+    @staticmethod
+    def _node_shape(tree_node) -> tuple:
+        """Capture a tree node and what it shows: (node, label, data, expanded, allow_expand, children).
+        
+        The children of a collapsed node are not captured, only whether it has any.
+        """
+        if tree_node.is_expanded:
+            children = [DiskVisualizerApp._node_shape(child) for child in tree_node.children]
+        else:
+            children = bool(tree_node.children)
+        return tree_node, tree_node.label, tree_node.data, tree_node.is_expanded, tree_node.allow_expand, children
+    
+    @staticmethod
+    def _add_node_shape(parent, shape: tuple, replaced: dict) -> None:
+        """Add a captured node under parent, recording which new node replaces which old one."""
+        old, label, data, expanded, allow_expand, children = shape
+        node = parent.add(label, data=data, expand=expanded, allow_expand=allow_expand)
+        replaced[old] = node
+        if children is True:
+            node.add_leaf("[...]", data=None)  # Listed again when expanded
+            return
+        for child in children or ():
+            DiskVisualizerApp._add_node_shape(node, child, replaced)
+    
+    def _add_children_paged(self, tree_node, children: list, add_child: Callable,
+                            size_of: Callable, start: int = 0) -> None:
+        """Add one page of children, then a "show next" node standing in for the rest.
+        
+        Only TREE_PAGE_SIZE labels are built per call, so expanding a directory
+        with hundreds of thousands of entries costs the same as a small one.
+        """
+        end = min(start + TREE_PAGE_SIZE, len(children))
+        for child in islice(children, start, end):
+            add_child(tree_node, child)
+        
+        remaining = len(children) - end
+        if remaining > 0:
+            rest_size = sum(size_of(child) for child in islice(children, end, None))
+            label = Text(
+                f"[+] show next {min(TREE_PAGE_SIZE, remaining)} / {remaining:,} smaller items "
+                f"({self.format_size(rest_size)})",
+                style="dim italic"
+            )
+            tree_node.add_leaf(label, data=TreePage(children, end, add_child, size_of))
+    
+    def _show_next_page(self, pager_node) -> None:
+        """Replace a "show next" node with the next page of its directory's children."""
+        page = pager_node.data
+        parent = pager_node.parent
+        pager_node.remove()
+        self._add_children_paged(parent, page.children, page.add_child, page.size_of, page.start)
+        self._after_populate(parent)
     
     def watch_tree_cursor(self) -> None:
         """Watch for tree cursor changes - load children on demand."""
@@ -296,33 +669,86 @@ class DiskVisualizerApp(Screen):
     async def _load_node_children(self, tree_node, file_node: FileNode) -> None:
         """Load children of a node on demand."""
         try:
-            # Scan directory in background
-            await asyncio.to_thread(
-                self._scan_directory, file_node
-            )
+            # List directory in background (shared with any concurrent request)
+            await self._load_directory(file_node)
+            tree_node = self._live_tree_node(tree_node)
+            if not self._has_placeholder(tree_node):
+                return  # Another request filled it first
+            
+            children = await asyncio.to_thread(self._sorted_children, file_node)
+            tree_node = self._live_tree_node(tree_node)
+            if not self._has_placeholder(tree_node):
+                return
             
-            # Update tree on main thread
-            if file_node.children:
-                # Remove placeholder children
-                tree_node.children = []
-                
-                # Add real children
-                for child in sorted(
-                    file_node.children,
-                    key=lambda x: x.total_size if x.is_dir else x.size,
-                    reverse=True
-                ):
-                    label = self.format_node_label(child)
-                    new_tree_node = tree_node.add(label, data=child)
-                    
-                    # Add placeholder for directories
-                    if child.is_dir:
-                        new_tree_node.add("[...]")
-                
-                self.refresh()
+            # Update tree on main thread: replace the placeholder with the first page
+            tree_node.remove_children()
+            self._add_children_paged(tree_node, children, self._add_file_node, lambda c: c.total_size)
+            self._after_populate(tree_node)
+            self.ui_updates.request_refresh()
+            
+            # Stats shown before the listing arrived only covered what was known then
+            if self.selected_node is file_node:
+                self.update_statistics(file_node)
+        except StaleRequest:
+            self._live_tree_node(tree_node).collapse()  # Cursor moved on; expanding again restarts the load
         except:
             pass
     
+    async def _load_directory(self, file_node: FileNode) -> None:
+        """Record a directory's children into the tree unless it is already listed.
+        
+        Uses a read-ahead listing if there is one, then the snapshot's (marked
+        stale until re-checked); otherwise lists in the background, joining a
+        listing already in flight.
+        """
+        if file_node.is_scanned:
+            return
+        children = self.prefetcher.pop(file_node.path)
+        stale = False
+        if children is None and self.snapshot is not None:
+            children = await asyncio.to_thread(self.snapshot.load_listing, file_node.path)
+            stale = children is not None
+        if children is None:
+            with self.prefetcher.foreground():
+                children = await self._list_directory(file_node.path)
+        if not self._adopt_children(file_node, children):
+            return
+        if stale:
+            file_node.is_stale = True
+            for child in children:
+                child.is_stale = True
+        else:
+            self._mark_dirty(file_node)
+    
+    async def _list_directory(self, path: str) -> list:
+        """List a directory in a worker thread, joining a listing already in flight."""
+        return await self.directory_loads.run(
+            path, lambda cancelled: self._list_children(path, cancelled)
+        )
+    
+    @staticmethod
+    def _adopt_children(node: FileNode, children: list) -> bool:
+        """Attach a listing's detached FileNodes to node (event loop only).
+        
+        Returns:
+            False if node was already listed (e.g. by a concurrent request)
+        """
+        if node.is_scanned:
+            return False
+        for child in children:
+            child.parent = node
+        # Swapped in whole, so a cache save walking the tree never sees a half-built list
+        node.children = children
+        node.is_scanned = True
+        node.invalidate_size_cache()
+        node.invalidate_stats_cache()
+        return True
+    
+    @staticmethod
+    def _has_placeholder(tree_node) -> bool:
+        """Whether a directory node still shows only its "[...]" placeholder."""
+        return len(tree_node.children) == 1 and tree_node.children[0].data is None
+    
     def _scan_full_tree(self, path: str) -> FileNode:
         """Scan full directory tree (unlimited depth)."""
         root = FileNode(name=path, path=path, is_dir=True)
@@ -357,19 +783,7 @@ class DiskVisualizerApp(Screen):
                     node.children.append(child)
                     self._scan_recursive(child, depth + 1)  # Recurse
                 else:
-                    try:
-                        size = os.path.getsize(full_path)
-                    except (OSError, PermissionError):
-                        size = 0
-                    
-                    child = FileNode(
-                        name=entry,
-                        path=full_path,
-                        size=size,
-                        is_dir=False,
-                        parent=node,
-                        is_scanned=True
-                    )
+                    child = make_file_node(entry, full_path, parent=node, is_scanned=True)
                     node.children.append(child)
             except Exception:
                 pass
@@ -407,19 +821,7 @@ class DiskVisualizerApp(Screen):
                     )
                     root.children.append(child)
                 else:
-                    try:
-                        size = os.path.getsize(full_path)
-                    except (OSError, PermissionError):
-                        size = 0
-                    
-                    child = FileNode(
-                        name=entry,
-                        path=full_path,
-                        size=size,
-                        is_dir=False,
-                        parent=root,
-                        is_scanned=True  # Files don't need scanning
-                    )
+                    child = make_file_node(entry, full_path, parent=root, is_scanned=True)  # Files don't need scanning
                     root.children.append(child)
             except Exception:
                 pass
@@ -454,18 +856,7 @@ class DiskVisualizerApp(Screen):
                     node.children.append(child)
                     self._scan_limited_depth(child, depth + 1, max_depth)
                 else:
-                    try:
-                        size = os.path.getsize(full_path)
-                    except (OSError, PermissionError):
-                        size = 0
-                    
-                    child = FileNode(
-                        name=entry,
-                        path=full_path,
-                        size=size,
-                        is_dir=False,
-                        parent=node
-                    )
+                    child = make_file_node(entry, full_path, parent=node)
                     node.children.append(child)
                     
             except Exception:
@@ -491,33 +882,14 @@ class DiskVisualizerApp(Screen):
             pass
     
     async def add_tree_nodes_async(self, tree_node, file_node: FileNode, progress_bar, depth: int = 0) -> None:
-        """Recursively add nodes with progress updates on main thread."""
+        """Add the first page of children; deeper levels load when expanded."""
         if not file_node.children:
             return
         
-        sorted_children = sorted(
-            file_node.children,
-            key=lambda x: x.total_size,
-            reverse=True
-        )
-        
-        for idx, child in enumerate(sorted_children):
-            try:
-                label = self.format_node_label(child)
-                new_tree_node = tree_node.add(label, data=child)
-                
-                # Recursively add children
-                if child.children:
-                    if depth == 0 and idx % 5 == 0:
-                        # Yield to UI every 5 nodes at depth 0
-                        self.title = f"Disk Octopus | Building tree... {idx}/{len(sorted_children)}"
-                        progress_bar.progress = 50 + (idx / len(sorted_children)) * 50
-                        self.refresh()
-                        await asyncio.sleep(0)
-                    
-                    await self.add_tree_nodes_async(new_tree_node, child, progress_bar, depth + 1)
-            except Exception:
-                pass
+        self.title = "Disk Octopus | Building tree..."
+        await self._populate_tree_node(tree_node, file_node)
+        progress_bar.progress = 100
+        self.ui_updates.request_refresh()
     
     async def populate_tree(self) -> None:
         """Populate the tree widget from FileNode structure."""
@@ -539,32 +911,8 @@ class DiskVisualizerApp(Screen):
             pass  # Silently fail if tree has issues
     
     async def add_tree_nodes(self, tree_node, file_node: FileNode, depth: int = 0) -> None:
-        """Recursively add FileNode children to tree with UI yields."""
-        if not file_node.children:
-            return
-        
-        # Sort by size descending
-        sorted_children = sorted(
-            file_node.children,
-            key=lambda x: x.size,
-            reverse=True
-        )
-        
-        for child in sorted_children:
-            try:
-                label = self.format_node_label(child)
-                new_tree_node = tree_node.add(label, data=child)
-                
-                # Recursively add children
-                if child.children:
-                    # Yield control to event loop every 10 nodes at depth 0
-                    # This keeps UI responsive during large tree builds
-                    if depth == 0 and sorted_children.index(child) % 10 == 0:
-                        await asyncio.sleep(0)
-                    
-                    await self.add_tree_nodes(new_tree_node, child, depth + 1)
-            except Exception:
-                pass  # Skip nodes that have issues
+        """Add the first page of FileNode children; deeper levels load when expanded."""
+        await self._populate_tree_node(tree_node, file_node)
     
     def format_node_label(self, node: FileNode) -> Text:
         """Format a node for display in tree with ASCII-safe icons."""
@@ -590,6 +938,9 @@ class DiskVisualizerApp(Screen):
                 else:
                     icon = "[d]"  # Directory - small
                     style = "bold cyan"
+            elif getattr(node, 'is_sparse', False):
+                icon = "[s]"  # Sparse file - mostly holes
+                style = "magenta"
             else:
                 # File icons using ASCII brackets
                 if node.size > 1e9:  # > 1GB
@@ -614,9 +965,11 @@ class DiskVisualizerApp(Screen):
             else:
                 size = 0
             
-            size_str = self.format_size(size)
+            size_str = "" if self._size_pending(node) else self.format_size(size)
             # Format: [D] name                 size (more compact)
             label = f"{icon} {node.name:<35} {size_str:>10}"
+            if getattr(node, 'is_stale', False):
+                style += " dim"  # From the snapshot, not re-checked yet
             return Text(label, style=style)
         except Exception as e:
             return Text(f"{icon} {node.name}", style=style)
@@ -643,6 +996,50 @@ class DiskVisualizerApp(Screen):
             size_bytes /= 1024
         return f"{size_bytes:.1f} PB"
     
+    def on_tree_node_highlighted(self, message: Tree.NodeHighlighted) -> None:
+        """Cancel loads the cursor has moved past and queue read-ahead of likely-next directories."""
+        try:
+            candidates = self._prefetch_candidates(message.node)
+            wanted = set(candidates)
+            node = message.node
+            while node is not None:
+                if isinstance(node.data, FileNode):
+                    wanted.add(node.data.path)
+                node = node.parent
+            self.directory_loads.cancel_except(lambda key: key in wanted)
+            self.prefetcher.schedule(candidates)
+        except Exception:
+            pass
+    
+    @staticmethod
+    def _prefetch_candidates(tree_node) -> list:
+        """Unlisted directories near the cursor: itself, the rows below, the largest siblings."""
+        tree = tree_node.tree
+        candidates = [tree_node]
+        for line in range(tree_node.line + 1, tree_node.line + 1 + PREFETCH_AHEAD):
+            candidates.append(tree.get_node_at_line(line))
+        if tree_node.parent is not None:
+            siblings = [
+                child for child in tree_node.parent.children
+                if isinstance(child.data, FileNode) and child.data.is_dir
+            ]
+            siblings.sort(key=lambda child: child.data.total_size, reverse=True)
+            candidates.extend(siblings[:PREFETCH_SIBLINGS])
+        return [
+            node.data.path for node in candidates
+            if node is not None and isinstance(node.data, FileNode)
+            and node.data.is_dir and not node.data.is_scanned
+        ]
+    
+    def on_tree_node_expanded(self, message: Tree.NodeExpanded) -> None:
+        """Fill an expanded FileNode directory whose children are still a placeholder."""
+        node = message.node
+        file_node = node.data
+        if not isinstance(file_node, FileNode) or not file_node.is_dir:
+            return
+        if self._has_placeholder(node):
+            asyncio.create_task(self._load_node_children(node, file_node))
+    
     def on_tree_node_selected(self, message: Tree.NodeSelected) -> None:
         """Handle tree node selection."""
         node = message.node
@@ -650,285 +1047,160 @@ class DiskVisualizerApp(Screen):
         if not node.data:
             return
         
-        # Handle both dict (lazy-loading) and FileNode (initial load) formats
-        if isinstance(node.data, dict):
-            # Dict-based node from lazy-loading
-            file_path = node.data.get("path")
-            is_dir = node.data.get("is_dir", False)
-            scanned = node.data.get("scanned", False)
-            
-            # If it's a directory that hasn't been scanned yet, load its children
-            if is_dir and not scanned and file_path:
-                # Load children asynchronously
-                asyncio.create_task(self._load_children_on_expand(node, file_path))
-            
-            # Store the node data for analysis
-            self.selected_node = node.data
-            
-            # Update analysis panel with dict data
-            self.update_analysis_panel_from_dict(node.data)
-            
-            # Update statistics if it's a directory
-            if is_dir:
-                self.update_statistics_from_dict(node.data)
-        else:
-            # FileNode object from initial tree load
-            file_node = node.data
-            
-            # Store the node for analysis
-            self.selected_node = file_node
-            
-            # Update analysis panel with FileNode data
-            self.update_analysis_panel_from_filenode(file_node)
-            
-            # Update statistics if it's a directory
-            if hasattr(file_node, 'is_dir') and file_node.is_dir:
-                self.update_statistics_from_filenode(file_node)
-
+        if isinstance(node.data, TreePage):
+            self._show_next_page(node)
+            return
+        
+        # Unlisted directories are loaded by on_tree_node_expanded (selection expands)
+        file_node = node.data
+        
+        # Store the node for analysis
+        self.selected_node = file_node
+        
+        # Update analysis panel with FileNode data
+        self.update_analysis_panel_from_filenode(file_node)
+        
+        # Update statistics if it's a directory
+        if hasattr(file_node, 'is_dir') and file_node.is_dir:
+            self.update_statistics_from_filenode(file_node)
     
-    async def _load_children_on_expand(self, tree_node, file_path: str) -> None:
-        """Load children of a folder when node is expanded."""
+    def _list_children(self, path: str, cancelled: Callable[[], bool] = None) -> list:
+        """List a directory as detached FileNodes (worker thread); subdirectories stay unlisted.
+        
+        Stops early (the result is discarded) once cancelled() returns True.
+        The directory's mtime is recorded so a later change can be noticed.
+        """
+        children = []
+        mtime = self._directory_mtime(path)  # Before listing: a change while listing shows up later
         try:
-            # Get entries in background
-            entries = await asyncio.to_thread(
-                self._get_directory_entries, file_path
-            )
-            
-            # Add to tree on main thread
-            if entries:
-                for entry_name, entry_path, is_dir, size in entries:
-                    icon = "[d]" if is_dir else "[f]"
-                    size_str = self.format_size(size) if size > 0 else ""
-                    # Format: [d] name                 size (more compact)
-                    label = f"{icon} {entry_name:<35} {size_str:>10}"
-                    
-                    child_node = tree_node.add(label)
-                    child_node.data = {"path": entry_path, "name": entry_name, "is_dir": is_dir, "size": size, "scanned": False}
-                    
-                    # Add placeholder for subdirectories
-                    if is_dir:
-                        child_node.add("[...]")
+            entries = os.listdir(path)
+        except (PermissionError, OSError):
+            return children  # Nothing to list; don't retry on expand
+        
+        for entry in entries:
+            if cancelled is not None and cancelled():
+                return []
+            try:
+                full_path = os.path.join(path, entry)
+                
+                if os.path.islink(full_path):
+                    continue
                 
-                # Mark as scanned
-                tree_node.data["scanned"] = True
-                self.refresh()
+                if os.path.isdir(full_path):
+                    children.append(FileNode(name=entry, path=full_path, is_dir=True))
+                else:
+                    children.append(make_file_node(entry, full_path))
+            except Exception:
+                pass
+        if mtime is not None:
+            self._listing_mtimes[path] = mtime
+        return children
+    
+    def _render_extension_table(self, extension_stats: dict) -> None:
+        """Fill the stats table with the top 20 extensions of a {ext: {count, size}} dict."""
+        table = self.query_one("#stats-table", DataTable)
+        table.clear()
+        
+        # Calculate total size
+        total_size = sum(stat['size'] for stat in extension_stats.values())
+        
+        # Sort by size descending
+        sorted_stats = sorted(
+            extension_stats.items(),
+            key=lambda x: x[1]['size'],
+            reverse=True
+        )
+        
+        # Add rows to table (top 20)
+        for ext, data in sorted_stats[:20]:
+            count = data['count']
+            size = data['size']
+            percentage = (size / total_size * 100) if total_size > 0 else 0
+            
+            ext_display = ext if ext else "Other"
+            size_display = self.format_size(size)
+            
+            table.add_row(
+                ext_display,
+                str(count),
+                size_display,
+                f"{percentage:.1f}%"
+            )
+    
+    def update_statistics(self, node: FileNode) -> None:
+        """Update statistics table from node.
+        
+        Stats already built for the node render inline; otherwise they are
+        built in a worker thread and dropped if the selection moves on. A
+        listed directory is then re-checked against its mtime on disk.
+        """
+        self._stats_generation += 1
+        if node.has_cached_stats():
+            self._show_node_statistics(node, self.file_type_analyzer.get_statistics(node))
+        else:
+            asyncio.create_task(self._compute_node_statistics(node, self._stats_generation))
+        if node.is_dir and node.is_scanned:
+            asyncio.create_task(self._recheck_listing(node, self._stats_generation))
+    
+    async def _recheck_listing(self, node: FileNode, generation: int) -> None:
+        """List a selected directory again if its mtime changed since it was listed.
+        
+        The new listing is merged into the tree (and the shown children) and
+        the stats are rebuilt. Directory mtime does not change when a file is
+        rewritten in place, so such size changes are only picked up on rescan.
+        """
+        try:
+            mtime = await asyncio.to_thread(self._directory_mtime, node.path)
+            if mtime is None or mtime == self._listing_mtimes.get(node.path):
+                return
+            fresh = await asyncio.to_thread(self._list_children, node.path)
+            added, removed = self._merge_listing(node, fresh)
+            self._mark_dirty(node)
+            tree_node = self.query_one("#file-tree", Tree).cursor_node
+            if tree_node is not None and tree_node.data is node:
+                self._patch_tree_children(tree_node, added, removed)
+                self.ui_updates.post(lambda: self._refresh_child_labels(tree_node), key=("children", id(tree_node)))
+                self.ui_updates.post(lambda: self._refresh_ancestor_labels(tree_node),
+                                     key=("ancestors", id(tree_node)))
+            if generation == self._stats_generation and self.selected_node is node:
+                self.update_statistics(node)
         except Exception:
             pass
     
-    def _get_directory_entries(self, path: str) -> list:
-        """Get directory entries as (name, path, is_dir, size) tuples."""
-        entries = []
+    @staticmethod
+    def _directory_mtime(path: str):
+        """Directory mtime in ns (changes when entries are added, removed or renamed)."""
         try:
-            for entry in os.listdir(path):
-                try:
-                    full_path = os.path.join(path, entry)
-                    
-                    if os.path.islink(full_path):
-                        continue
-                    
-                    is_dir = os.path.isdir(full_path)
-                    size = 0
-                    
-                    if is_dir:
-                        # Don't calculate folder size - just mark as directory
-                        size = 0
-                    else:
-                        try:
-                            size = os.path.getsize(full_path)
-                        except:
-                            size = 0
-                    
-                    entries.append((entry, full_path, is_dir, size))
-                except:
-                    pass
-        except:
-            pass
-        
-        # Sort by name
-        entries.sort(key=lambda x: x[0])
-        return entries
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
     
-    def update_statistics_from_dict(self, node_dict: dict) -> None:
-        """Update statistics table from dict-based node (directory)."""
+    async def _compute_node_statistics(self, node: FileNode, generation: int) -> None:
+        """Build a node's stats and aggregates off the UI thread, then render them."""
+        def build():
+            node.get_aggregate()
+            return self.file_type_analyzer.get_statistics(node)
         try:
-            is_dir = node_dict.get("is_dir", False)
-            if not is_dir:
-                return
+            stats = await asyncio.to_thread(build)
+        except Exception as e:
+            self.notify(f"Stats error: {e}", severity="error")
+            return
+        if generation == self._stats_generation:
+            self._show_node_statistics(node, stats)
+    
+    def _show_node_statistics(self, node: FileNode, stats) -> None:
+        """Render a node's extension statistics and size sparkline."""
+        try:
+            table = self.query_one("#stats-table", DataTable)
+            table.clear()
             
-            path = node_dict.get("path", "")
-            if not path:
-                return
+            # Store extension data for later path display; paths are
+            # walked lazily from the node when a row is selected
+            self.extension_data = {}
+            self.stats_source_node = node
             
-            # Collect file statistics for this directory
-            extension_stats = {}
-            
-            try:
-                entries = os.listdir(path)
-            except (PermissionError, OSError):
-                return
-            
-            for entry in entries:
-                try:
-                    full_path = os.path.join(path, entry)
-                    
-                    if os.path.islink(full_path):
-                        continue
-                    
-                    if os.path.isdir(full_path):
-                        continue  # Skip subdirectories
-                    
-                    # Get file size and extension
-                    try:
-                        size = os.path.getsize(full_path)
-                    except:
-                        size = 0
-                    
-                    # Extract extension
-                    if '.' in entry:
-                        ext = entry.split('.')[-1].lower()
-                        ext = f".{ext}"
-                    else:
-                        ext = "Other"
-                    
-                    if ext not in extension_stats:
-                        extension_stats[ext] = {'count': 0, 'size': 0, 'files': []}
-                    
-                    extension_stats[ext]['count'] += 1
-                    extension_stats[ext]['size'] += size
-                    extension_stats[ext]['files'].append(full_path)
-                except:
-                    pass
-            
-            # Update the stats table
-            table = self.query_one("#stats-table", DataTable)
-            table.clear()
-            
-            # Store extension data for later path display
-            self.extension_data = extension_stats
-            
-            # Calculate total size
-            total_size = sum(stat['size'] for stat in extension_stats.values())
-            
-            # Sort by size descending
-            sorted_stats = sorted(
-                extension_stats.items(),
-                key=lambda x: x[1]['size'],
-                reverse=True
-            )
-            
-            # Add rows to table (top 20)
-            for ext, data in sorted_stats[:20]:
-                count = data['count']
-                size = data['size']
-                percentage = (size / total_size * 100) if total_size > 0 else 0
-                
-                ext_display = ext if ext else "Other"
-                size_display = self.format_size(size)
-                
-                table.add_row(
-                    ext_display,
-                    str(count),
-                    size_display,
-                    f"{percentage:.1f}%"
-                )
-        except Exception as e:
-            pass
-    
-    async def _load_children_async(self, tree_node, file_node: FileNode) -> None:
-        """Load children of a folder asynchronously."""
-        try:
-            # Scan directory in background
-            await asyncio.to_thread(
-                self._scan_directory, file_node
-            )
-            
-            # Update tree on main thread
-            if file_node.children:
-                # Remove all children (including placeholder)
-                for child in list(tree_node.children):
-                    tree_node.children.remove(child)
-                
-                # Sort and add children
-                sorted_children = sorted(
-                    file_node.children,
-                    key=lambda x: x.total_size if x.is_dir else x.size,
-                    reverse=True
-                )
-                
-                for child in sorted_children:
-                    label = self.format_node_label(child)
-                    new_tree_node = tree_node.add(label, data=child)
-                    
-                    # Add placeholder for directories (to show they're expandable)
-                    if child.is_dir and not child.is_scanned:
-                        new_tree_node.add("[loading]", data=None)
-                
-                # Refresh to show changes
-                self.refresh()
-        except Exception as e:
-            pass
-    
-    def _scan_directory(self, node: FileNode) -> None:
-        """Scan a single directory and populate its children."""
-        # If already scanned, skip
-        if node.is_scanned:
-            return
-        
-        if not node.is_dir:
-            return
-        
-        try:
-            entries = os.listdir(node.path)
-        except (PermissionError, OSError):
-            node.is_scanned = True
-            return
-        
-        for entry in entries:
-            try:
-                full_path = os.path.join(node.path, entry)
-                
-                if os.path.islink(full_path):
-                    continue
-                
-                if os.path.isdir(full_path):
-                    child = FileNode(
-                        name=entry,
-                        path=full_path,
-                        is_dir=True,
-                        parent=node,
-                        is_scanned=False  # Mark subdirectories as not yet scanned
-                    )
-                    node.children.append(child)
-                else:
-                    try:
-                        size = os.path.getsize(full_path)
-                    except (OSError, PermissionError):
-                        size = 0
-                    
-                    child = FileNode(
-                        name=entry,
-                        path=full_path,
-                        size=size,
-                        is_dir=False,
-                        parent=node,
-                        is_scanned=True  # Files are "scanned" (no children)
-                    )
-                    node.children.append(child)
-            except Exception:
-                pass
-        
-        node.is_scanned = True
-    
-    def update_statistics(self, node: FileNode) -> None:
-        """Update statistics table from node."""
-        try:
-            stats = self.file_type_analyzer.get_statistics(node)
-            
-            table = self.query_one("#stats-table", DataTable)
-            table.clear()
-            
-            # Store extension data for later path display
-            self.extension_data = {}
+            aggregate = node.get_aggregate()
+            self.update_size_sparkline(aggregate.size_histogram if aggregate else [])
             
             if stats:
                 # stats is list of (extension, stats_dict) tuples
@@ -936,10 +1208,9 @@ class DiskVisualizerApp(Screen):
                     count = data['count']
                     size = data['size']
                     percentage = data.get('percentage_by_size', 0)  # Use correct key
-                    files = data.get('files', [])  # Get file paths
                     
                     # Store for later access
-                    self.extension_data[ext] = files
+                    self.extension_data[ext] = data
                     
                     ext_display = ext if ext else "Other"
                     size_display = self.format_size(size)
@@ -953,6 +1224,16 @@ class DiskVisualizerApp(Screen):
         except Exception as e:
             self.notify(f"Stats error: {e}", severity="error")
     
+    def update_size_sparkline(self, histogram) -> None:
+        """Show the log2 file size distribution above the stats table."""
+        try:
+            line = sparkline(histogram)
+            self.query_one("#stats-sparkline", Static).update(
+                f"Sizes: {line}" if line else ""
+            )
+        except Exception:
+            pass  # Panel may not exist yet
+    
     def on_data_table_row_selected(self, event: DataTable.RowSelected) -> None:
         """Handle statistics table row selection - show file paths in separate grid."""
         try:
@@ -988,31 +1269,125 @@ class DiskVisualizerApp(Screen):
             
             # Get file paths for this extension
             data = self.extension_data.get(extension, {})
+            if self.stats_source_node is not None:
+                source = self.stats_source_node
+                asyncio.create_task(self._show_paths_from_node(source, extension))
+                return
             if isinstance(data, dict):
-                files = data.get('files', [])
+                rows = PagedRows(data.get('files', []), data.get('sizes'))
             else:
                 # Legacy format: extension_data[ext] is just the files list
-                files = data if isinstance(data, list) else []
-            
-            if not files:
-                return
-            
-            # Update paths table with all file paths
-            paths_table.clear()
-            
-            # Show all file paths
-            for file_path in files:
-                paths_table.add_row(file_path)
-            
-            # Update header to show count
-            paths_header = self.query_one("#paths-header", Label)
-            paths_header.update(f"[bold][ File Paths - {extension} ({len(files)} files) ][/bold]")
+                rows = PagedRows(data if isinstance(data, list) else [])
+            if len(rows):
+                asyncio.create_task(self._show_paths(rows, f"File Paths - {extension}"))
                 
         except Exception as e:
             # Silently handle errors
             pass
-
-
+    
+    def on_data_table_cell_selected(self, event: DataTable.CellSelected) -> None:
+        """A selected search result opens the tree at its node."""
+        if event.control.id == "paths-table" and self._showing_search:
+            asyncio.create_task(self._jump_to_path(event.cell_key.row_key.value))
+    
+    async def _show_paths_from_node(self, node: FileNode, extension: str) -> None:
+        """Collect an extension's files off the UI thread, then show their first page."""
+        rows = await asyncio.to_thread(PagedRows.from_files, node.iter_files(extension))
+        if len(rows) and node is self.stats_source_node:
+            await self._show_paths(rows, f"File Paths - {extension}")
+    
+    async def _show_paths(self, rows: PagedRows, title: str) -> None:
+        """Back the paths table with rows, applying the current sort and filter."""
+        self._showing_search = False
+        self.paths_rows = rows
+        self._paths_title = title
+        if self.query_one("#paths-filter", Input).value or self._sort_paths_by_size:
+            await self._refresh_paths_view()
+        else:
+            self._render_paths()
+    
+    def _render_paths(self) -> None:
+        """Show the first page of paths_rows and a header with the match count."""
+        paths_table = self.query_one("#paths-table", DataTable)
+        paths_table.clear()
+        self._paths_loaded = 0
+        self._load_paths_page()
+        
+        rows = self.paths_rows
+        details = f"{len(rows)} files"
+        if rows.needle:
+            details += f" matching '{rows.needle}'"
+        if rows.sort_by_size:
+            details += ", largest first"
+        paths_header = self.query_one("#paths-header", Label)
+        paths_header.update(f"[bold][ {self._paths_title} ({details}) ][/bold]")
+    
+    def _load_paths_page(self) -> None:
+        """Append the next page of paths_rows to the table."""
+        if self.paths_rows is None or self._paths_loaded >= len(self.paths_rows):
+            return
+        paths_table = self.query_one("#paths-table", DataTable)
+        page = self.paths_rows.page(self._paths_loaded, PAGE_SIZE)
+        paths_table.add_rows(
+            (path, self.format_size(size) if size >= 0 else "") for path, size in page
+        )
+        self._paths_loaded += len(page)
+    
+    def _on_paths_scroll(self, scroll_y: float) -> None:
+        """Fetch the next page when the table is scrolled near its last loaded row."""
+        paths_table = self.query_one("#paths-table", DataTable)
+        if scroll_y >= paths_table.max_scroll_y - paths_table.size.height:
+            self._load_paths_page()
+    
+    def on_data_table_row_highlighted(self, event: DataTable.RowHighlighted) -> None:
+        """Fetch the next page when the cursor gets close to the last loaded row."""
+        if event.control.id == "paths-table" and event.cursor_row >= self._paths_loaded - 10:
+            self._load_paths_page()
+    
+    def on_data_table_header_selected(self, event: DataTable.HeaderSelected) -> None:
+        """Clicking the Size header of the paths table toggles sorting by size."""
+        if event.control.id == "paths-table" and str(event.label) == "Size":
+            self.action_sort_paths()
+    
+    def _reset_paths_table(self) -> DataTable:
+        """Clear the paths table for a feature view that fills it directly."""
+        self.paths_rows = None
+        self._paths_loaded = 0
+        self._showing_search = False
+        paths_table = self.query_one("#paths-table", DataTable)
+        paths_table.clear()
+        return paths_table
+    
+    def action_sort_paths(self) -> None:
+        """Toggle sorting the current paths listing by size."""
+        self._sort_paths_by_size = not self._sort_paths_by_size
+        if self.paths_rows is not None:
+            asyncio.create_task(self._refresh_paths_view())
+    
+    async def on_input_changed(self, event: Input.Changed) -> None:
+        """Narrow the paths listing as the filter is typed, or search names as they are typed."""
+        if event.input.id == "search-input":
+            self._search_generation += 1
+            asyncio.create_task(self._run_search(event.value.strip(), self._search_generation))
+            return
+        if event.input.id != "paths-filter" or self.paths_rows is None:
+            return
+        await self._refresh_paths_view()
+    
+    async def _refresh_paths_view(self) -> None:
+        """Build the sorted, filtered view off the UI thread; stale runs are dropped.
+        
+        Only the latest run installs its view, on the UI thread, so pages are
+        never read from a view built for another filter.
+        """
+        self._paths_filter_generation += 1
+        generation = self._paths_filter_generation
+        rows = self.paths_rows
+        needle = self.query_one("#paths-filter", Input).value
+        view = await asyncio.to_thread(rows.build_view, self._sort_paths_by_size, needle)
+        if generation == self._paths_filter_generation and rows is self.paths_rows:
+            rows.set_view(view)
+            self._render_paths()
     
     def _get_file_metadata(self, extension: str) -> dict:
         """Get metadata about file type (popularity, safety, etc.)."""
@@ -1075,23 +1450,21 @@ class DiskVisualizerApp(Screen):
             panel = self.query_one("#analysis-panel", Static)
             
             lines = []
+            node = self.selected_node
             
-            # Handle both dict and FileNode data
-            if isinstance(self.selected_node, dict):
-                self.update_analysis_panel_from_dict(self.selected_node)
-                return
-            
-            lines.append(f"[bold cyan]{self.selected_node.name}[/bold cyan]")
+            lines.append(f"[bold cyan]{node.name}[/bold cyan]")
             
             # File info
-            size_val = self.selected_node.size if hasattr(self.selected_node, 'size') else self.selected_node.total_size
+            size_val = node.total_size
+            lines.append(f"Type: [cyan]{'Directory' if node.is_dir else 'File'}[/cyan]")
             lines.append(f"Size: [bold]{self.format_size(size_val)}[/bold]")
+            lines.append(f"Path: [dim]{node.path}[/dim]")
             
-            if hasattr(self.selected_node, 'children') and self.selected_node.children:
-                lines.append(f"Items: [bold]{len(self.selected_node.children)}[/bold]")
+            if node.children:
+                lines.append(f"Items: [bold]{len(node.children)}[/bold]")
             
             # Get file type analysis and metadata
-            extension = self.selected_node.get_extension() if hasattr(self.selected_node, 'get_extension') else ''
+            extension = '' if node.is_dir else node.get_extension()
             if extension:
                 # Get file metadata
                 metadata = self._get_file_metadata(extension)
@@ -1135,53 +1508,6 @@ class DiskVisualizerApp(Screen):
         except Exception as e:
             pass  # Panel may not exist yet
     
-    def update_analysis_panel_from_dict(self, node_dict: dict) -> None:
-        """Update analysis panel from dict-based node data."""
-        try:
-            panel = self.query_one("#analysis-panel", Static)
-            
-            lines = []
-            name = node_dict.get("name", "Unknown")
-            size = node_dict.get("size", 0)
-            is_dir = node_dict.get("is_dir", False)
-            
-            lines.append(f"[bold cyan]{name}[/bold cyan]")
-            lines.append(f"Type: [cyan]{'Directory' if is_dir else 'File'}[/cyan]")
-            lines.append(f"Size: [bold]{self.format_size(size)}[/bold]")
-            lines.append(f"Path: [dim]{node_dict.get('path', '')}[/dim]")
-            
-            # Get metadata for files
-            if not is_dir and name:
-                # Extract extension from name
-                if '.' in name:
-                    extension = '.' + name.split('.')[-1]
-                    metadata = self._get_file_metadata(extension)
-                    
-                    # Safety status
-                    safety = metadata.get('safety', 'Unknown')
-                    if safety == 'Safe':
-                        safety_color = 'green'
-                        safety_icon = '✓'
-                    elif safety == 'Warning':
-                        safety_color = 'yellow'
-                        safety_icon = '⚠'
-                    elif safety == 'Risky':
-                        safety_color = 'red'
-                        safety_icon = '✗'
-                    else:
-                        safety_color = 'cyan'
-                        safety_icon = '?'
-                    
-                    lines.append("")
-                    lines.append(f"[bold cyan]File Info:[/bold cyan]")
-                    lines.append(f"Type: [cyan]{metadata.get('type', 'Unknown')}[/cyan]")
-                    lines.append(f"Popularity: [cyan]{metadata.get('popularity', 'Unknown')}[/cyan]")
-                    lines.append(f"[{safety_color}]{safety_icon} Safety: {safety}[/{safety_color}]")
-            
-            panel.update("\n".join(lines))
-        except Exception as e:
-            pass  # Panel may not exist yet
-    
     def update_analysis_panel_from_filenode(self, file_node: FileNode) -> None:
         """Update analysis panel from FileNode."""
         # FileNode analysis is handled by the existing update_analysis_panel() method
@@ -1212,7 +1538,21 @@ q - Quit application
 h - Show this help
 s - Show statistics
 a - Analyze selected item (file type)
-d - Deep analysis of file contents using Copilot
+d - Deep analysis of file contents using Copilot (plus a data/hole map of the file);
+    runs in the background, press again on other files to queue them
+x - Cancel the running deep analysis (queued ones carry on)
+l - Largest files in the selected subtree
+c - Cold data: directories ranked by bytes untouched for 90+ days
+u - Duplicate files: reclaimable bytes per directory
+i - Identical directories (by structure); I - verify them by content
+o - Disk usage by owner (user and group)
+t - Content types detected from file headers (magic bytes), with the extensions they hide behind
+z - Estimated zlib/lzma savings for the selected subtree (sampled, with a 95% interval)
+/ - Filter, e.g. ext in (.log,.gz) and size > 100M and mtime < 30d under /var
+    (fields: size ext name path mtime atime uid gid; empty filter restores the tree)
+f - Find by name as you type, largest first, across every directory listed so far
+    (also in earlier sessions); Enter on a result opens the tree at it
+S - Sort the file paths list by size (or click its Size header); type in its box to narrow it
 
 [bold cyan]MOUSE INTERACTION[/bold cyan]
 
@@ -1274,88 +1614,605 @@ Click items in the tree to navigate and view details.
         except Exception as e:
             self.notify(f"Analysis error: {e}", severity="error")
     
+    async def _get_selected_subtree(self):
+        """Get the selected directory (or a file's parent) with its whole subtree listed.
+        
+        Directories not listed yet are scanned once in the background and
+        grafted into the tree, so later subtree views below them are instant
+        and the scan is cached with the rest of the tree. The subtree's
+        aggregates are built in a worker thread too, so callers can read
+        them on the UI thread.
+        """
+        selected = self.selected_node
+        if isinstance(selected, FileNode):
+            node = selected if selected.is_dir else selected.parent
+        else:
+            node = self.root_node
+        if node is None:
+            return None
+        
+        unlisted = await asyncio.to_thread(self._unlisted_directories, node)
+        if unlisted:
+            self.notify(f"Scanning {node.path}...", timeout=3)
+            scans = await asyncio.to_thread(
+                lambda: [(directory, DiskScanner(directory.path).scan(None, False)) for directory in unlisted]
+            )
+            for directory, scanned in scans:
+                if self._adopt_children(directory, scanned.children):
+                    self._mark_dirty(directory)
+                    for descendant in scanned.children:
+                        self._mark_listed_subtree(descendant)
+        await asyncio.to_thread(node.get_aggregate)
+        return node
+    
+    def _mark_listed_subtree(self, node: FileNode) -> None:
+        """Queue every listed directory under (and including) node for saving."""
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if current.is_dir and current.is_scanned:
+                self._dirty_listings[id(current)] = current
+                stack.extend(current.children)
+    
+    @staticmethod
+    def _unlisted_directories(node: FileNode) -> list:
+        """Directories in node's subtree whose children were never listed (topmost only)."""
+        unlisted = []
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if not current.is_scanned:
+                unlisted.append(current)
+                continue
+            stack.extend(child for child in current.children if child.is_dir)
+        return unlisted
+    
+    async def action_show_largest(self) -> None:
+        """Show the largest files in the selected subtree in the paths table."""
+        try:
+            node = await self._get_selected_subtree()
+            if node is None:
+                self.notify("No directory selected", severity="warning")
+                return
+            
+            paths_table = self._reset_paths_table()
+            
+            largest = node.get_largest_files()
+            for file_node in largest:
+                paths_table.add_row(file_node.path, self.format_size(file_node.size))
+            
+            paths_header = self.query_one("#paths-header", Label)
+            paths_header.update(f"[bold][ Largest Files - {node.name} ({len(largest)}) ][/bold]")
+        except Exception as e:
+            self.notify(f"Largest files error: {e}", severity="error")
+    
+    async def action_show_cold_data(self) -> None:
+        """Rank directories in the selected subtree by bytes in their own files not touched recently."""
+        try:
+            node = await self._get_selected_subtree()
+            if node is None:
+                self.notify("No directory selected", severity="warning")
+                return
+            
+            cold_days, frozen_days = AGE_BUCKET_DAYS[1], AGE_BUCKET_DAYS[2]
+            ranked = await asyncio.to_thread(self._cold_directories, node, cold_days, frozen_days)
+            
+            paths_table = self._reset_paths_table()
+            for directory, cold, frozen in ranked:
+                paths_table.add_row(
+                    directory.path,
+                    f"{self.format_size(cold)} ({self.format_size(frozen)} >{frozen_days}d)"
+                )
+            
+            paths_header = self.query_one("#paths-header", Label)
+            paths_header.update(
+                f"[bold][ Cold Data - own files untouched >{cold_days}d under {node.name} ][/bold]"
+            )
+        except Exception as e:
+            self.notify(f"Cold data error: {e}", severity="error")
+    
+    @staticmethod
+    def _cold_directories(node: FileNode, cold_days: int, frozen_days: int, limit: int = 50) -> list:
+        """The directories whose own files hold the most cold bytes: (directory, cold, frozen).
+        
+        Aggregates already hold age-bucketed bytes per subtree, so a directory's
+        own share is its total less its subdirectories' (no disk access).
+        Subtree totals would always rank the selected directory and its chain
+        of largest descendants first, hiding where the cold data sits.
+        """
+        directories = []
+        stack = [node]
+        while stack:
+            directory = stack.pop()
+            subdirectories = [child for child in directory.children if child.is_dir]
+            aggregate = directory.get_aggregate()
+            cold = aggregate.stale_bytes(cold_days)
+            frozen = aggregate.stale_bytes(frozen_days)
+            for child in subdirectories:
+                cold -= child.get_aggregate().stale_bytes(cold_days)
+                frozen -= child.get_aggregate().stale_bytes(frozen_days)
+            if cold > 0:
+                directories.append((directory, cold, frozen))
+            stack.extend(subdirectories)
+        return heapq.nlargest(limit, directories, key=lambda entry: entry[1])
+    
+    async def action_find_duplicates(self) -> None:
+        """Find duplicate files in the selected subtree and show reclaimable bytes per directory."""
+        try:
+            node = await self._get_selected_subtree()
+            if node is None:
+                self.notify("No directory selected", severity="warning")
+                return
+            
+            self.notify(f"Searching for duplicates under {node.name}...", timeout=3)
+            finder = DuplicateFinder(cache=self.cache)
+            report = await asyncio.to_thread(finder.find, node)
+            
+            paths_table = self._reset_paths_table()
+            ranked = sorted(
+                report.reclaimable_by_directory.items(), key=lambda x: x[1], reverse=True
+            )
+            for dir_path, reclaimable in ranked[:50]:
+                paths_table.add_row(dir_path, self.format_size(reclaimable))
+            
+            paths_header = self.query_one("#paths-header", Label)
+            paths_header.update(
+                f"[bold][ Duplicates - {len(report.groups)} groups, "
+                f"{self.format_size(report.reclaimable)} reclaimable ][/bold]"
+            )
+        except Exception as e:
+            self.notify(f"Duplicate search error: {e}", severity="error")
+    
+    async def action_find_duplicate_dirs(self, verify: bool = False) -> None:
+        """Show identical subtrees under the selected directory from their fingerprints."""
+        try:
+            node = await self._get_selected_subtree()
+            if node is None:
+                self.notify("No directory selected", severity="warning")
+                return
+            
+            finder = DuplicateFinder(cache=self.cache)
+            if verify:
+                self.notify(f"Verifying identical directories under {node.name}...", timeout=3)
+                groups = await asyncio.to_thread(finder.find_directories, node, True)
+            else:
+                groups = await asyncio.to_thread(finder.find_directories, node)
+            
+            paths_table = self._reset_paths_table()
+            for group in groups[:50]:
+                for directory in group.directories:
+                    paths_table.add_row(directory.path, self.format_size(group.size))
+            
+            reclaimable = sum(group.reclaimable for group in groups)
+            mode = "verified" if verify else "by structure; I to verify"
+            paths_header = self.query_one("#paths-header", Label)
+            paths_header.update(
+                f"[bold][ Identical Dirs ({mode}) - {len(groups)} groups, "
+                f"{self.format_size(reclaimable)} reclaimable ][/bold]"
+            )
+        except Exception as e:
+            self.notify(f"Identical directory error: {e}", severity="error")
+    
+    async def action_verify_duplicate_dirs(self) -> None:
+        """Find identical subtrees and confirm them with file content hashes."""
+        await self.action_find_duplicate_dirs(verify=True)
+    
+    async def action_show_owners(self) -> None:
+        """Show per-user and per-group usage of the selected subtree from its aggregates."""
+        try:
+            node = await self._get_selected_subtree()
+            if node is None:
+                self.notify("No directory selected", severity="warning")
+                return
+            
+            aggregate = node.get_aggregate()
+            paths_table = self._reset_paths_table()
+            
+            for label, usage, lookup in (
+                ("user", aggregate.owner_usage, self._user_name),
+                ("group", aggregate.group_usage, self._group_name),
+            ):
+                ranked = sorted(usage.items(), key=lambda x: x[1][0], reverse=True)
+                for owner_id, (size, files) in ranked:
+                    paths_table.add_row(
+                        f"{label} {lookup(owner_id)} ({owner_id})" if owner_id >= 0 else f"{label} unknown",
+                        f"{self.format_size(size)} ({files} files)"
+                    )
+            
+            paths_header = self.query_one("#paths-header", Label)
+            paths_header.update(
+                f"[bold][ Usage by Owner - {node.name} ({len(aggregate.owner_usage)} users) ][/bold]"
+            )
+        except Exception as e:
+            self.notify(f"Owner usage error: {e}", severity="error")
+    
+    async def action_show_content_types(self) -> None:
+        """Group the selected subtree by content type sniffed from file headers."""
+        try:
+            node = await self._get_selected_subtree()
+            if node is None:
+                self.notify("No directory selected", severity="warning")
+                return
+            
+            self.notify(f"Reading file headers under {node.name}...", timeout=3)
+            sniffer = ContentSniffer(cache=self.cache)
+            statistics = await asyncio.to_thread(
+                self.file_type_analyzer.get_detected_type_statistics, node, sniffer, 50
+            )
+            
+            paths_table = self._reset_paths_table()
+            for content_type, stats in statistics:
+                extensions = sorted(stats['extensions'].items(), key=lambda x: x[1], reverse=True)
+                shown = ", ".join(f"{ext} ({count})" for ext, count in extensions[:4])
+                if len(extensions) > 4:
+                    shown += ", ..."
+                paths_table.add_row(
+                    f"{content_type}: {shown}",
+                    f"{self.format_size(stats['size'])} ({stats['count']} files)"
+                )
+            
+            paths_header = self.query_one("#paths-header", Label)
+            paths_header.update(f"[bold][ Content Types - {node.name} ][/bold]")
+        except Exception as e:
+            self.notify(f"Content type error: {e}", severity="error")
+    
+    async def action_estimate_compression(self) -> None:
+        """Estimate how much the selected subtree would shrink if compressed."""
+        try:
+            node = await self._get_selected_subtree()
+            if node is None:
+                self.notify("No directory selected", severity="warning")
+                return
+            
+            self.notify(f"Sampling blocks under {node.name}...", timeout=3)
+            estimates = await asyncio.to_thread(CompressionEstimator().estimate, node)
+            if not estimates:
+                self.notify("No readable file data to sample", severity="warning")
+                return
+            
+            paths_table = self._reset_paths_table()
+            for estimate in estimates.values():
+                low, high = estimate.savings_range
+                paths_table.add_row(
+                    f"{estimate.method}: {estimate.ratio:.0%} of original "
+                    f"(saves {self.format_size(low)} - {self.format_size(high)})",
+                    self.format_size(estimate.estimated_size)
+                )
+            
+            sample = next(iter(estimates.values()))
+            paths_header = self.query_one("#paths-header", Label)
+            paths_header.update(
+                f"[bold][ Compressibility - {node.name}: {self.format_size(sample.total_bytes)}, "
+                f"sampled {self.format_size(sample.sampled_bytes)} in {sample.blocks} blocks ][/bold]"
+            )
+        except Exception as e:
+            self.notify(f"Compression estimate error: {e}", severity="error")
+    
+    @staticmethod
+    def _user_name(uid: int) -> str:
+        """Resolve a uid to a user name where the platform supports it."""
+        try:
+            return pwd.getpwuid(uid).pw_name
+        except Exception:
+            return "?"
+    
+    @staticmethod
+    def _group_name(gid: int) -> str:
+        """Resolve a gid to a group name where the platform supports it."""
+        try:
+            return grp.getgrgid(gid).gr_name
+        except Exception:
+            return "?"
+    
+    def action_focus_filter(self) -> None:
+        """Move focus to the filter box."""
+        self.query_one("#filter-input", Input).focus()
+    
+    def action_focus_search(self) -> None:
+        """Move focus to the name search box."""
+        self.query_one("#search-input", Input).focus()
+    
+    async def _run_search(self, text: str, generation: int) -> None:
+        """Stream names containing text into the paths table, largest first.
+        
+        Searches the snapshot's trigram index, which holds every directory
+        listed in this or an earlier session; listings made since the last
+        save are saved first. A newer keystroke stops the run between batches.
+        """
+        paths_header = self.query_one("#paths-header", Label)
+        if not text or self.snapshot is None:
+            if generation == self._search_generation and self._showing_search:
+                self._reset_paths_table()
+                paths_header.update("[bold][ File Paths ][/bold]")
+            return
+        
+        try:
+            await self._save_tree_to_cache()
+            if generation != self._search_generation:
+                return
+            
+            matches = self.snapshot.names.search(text)
+            try:
+                paths_table = None
+                shown = 0
+                while shown < SEARCH_RESULT_LIMIT:
+                    batch = await asyncio.to_thread(next, matches, None)
+                    if generation != self._search_generation:
+                        return  # A newer search took over
+                    if paths_table is None:
+                        paths_table = self._reset_paths_table()
+                        self._showing_search = True
+                    if batch is None:
+                        break
+                    batch = batch[:SEARCH_RESULT_LIMIT - shown]
+                    for path, is_dir, size in batch:
+                        label = path + os.sep if is_dir else path
+                        paths_table.add_row(label, self.format_size(size), key=path)
+                    shown += len(batch)
+                    paths_header.update(f"[bold][ Search - '{text}' ({shown} so far, largest first) ][/bold]")
+            finally:
+                matches.close()
+            
+            more = "+" if shown >= SEARCH_RESULT_LIMIT else ""
+            paths_header.update(
+                f"[bold][ Search - '{text}' ({shown}{more} matches, largest first; Enter jumps) ][/bold]"
+            )
+        except Exception as e:
+            self.notify(f"Search error: {e}", severity="error")
+    
+    async def _jump_to_path(self, path: str) -> None:
+        """Select path in the tree, expanding (and listing) its ancestors on the way."""
+        tree = self.query_one("#file-tree", Tree)
+        if tree.root.data is not self.root_node:
+            await self.start_scan()  # Leave a filtered view for the full tree
+        
+        relative = os.path.relpath(path, self.drive_path)
+        if relative.startswith(os.pardir):
+            self.notify(f"Not under {self.drive_path}: {path}", severity="warning")
+            return
+        
+        tree_node = tree.root
+        for name in relative.split(os.sep):
+            if self._has_placeholder(tree_node):
+                await self._load_node_children(tree_node, tree_node.data)
+                tree_node = self._live_tree_node(tree_node)
+                if self._has_placeholder(tree_node):
+                    return  # Listing failed or was cancelled by a cursor move
+            tree_node.expand()
+            child = self._find_tree_child(tree_node, name)
+            if child is None:
+                self.notify(f"No longer on disk: {path}", severity="warning")
+                return
+            tree_node = child
+        
+        # Line numbers of the nodes just added are only known after the next refresh
+        self.call_after_refresh(tree.select_node, tree_node)
+        self.call_after_refresh(tree.scroll_to_node, tree_node)
+        tree.focus()
+    
+    def _find_tree_child(self, tree_node, name: str):
+        """Get the child of tree_node named name, showing further pages until it is added."""
+        while True:
+            pager = None
+            for child in tree_node.children:
+                if isinstance(child.data, FileNode) and child.data.name == name:
+                    return child
+                if isinstance(child.data, TreePage):
+                    pager = child
+            if pager is None or not any(
+                entry.name == name for entry in islice(pager.data.children, pager.data.start, None)
+            ):
+                return None
+            self._show_next_page(pager)
+    
+    async def on_input_submitted(self, event: Input.Submitted) -> None:
+        """Run a filter query and stream matching files into the tree and stats table."""
+        if event.input.id == "search-input":
+            # Results are picked from the paths table
+            if self._showing_search:
+                self.query_one("#paths-table", DataTable).focus()
+            return
+        if event.input.id != "filter-input":
+            return
+        
+        self._filter_generation += 1
+        generation = self._filter_generation
+        text = event.value.strip()
+        tree = self.query_one("#file-tree", Tree)
+        
+        if not text:
+            # Empty filter restores the normal tree
+            await self.start_scan()
+            tree.focus()
+            return
+        
+        try:
+            query = TreeQuery(text)
+        except QueryError as e:
+            self.notify(f"Filter error: {e}", severity="error")
+            return
+        
+        try:
+            node = await self._get_selected_subtree()
+            if node is None or generation != self._filter_generation:
+                return
+            
+            tree.clear()
+            tree.root.data = node
+            tree.root.label = Text(f"[F] {node.path}  ({text})", style="bold magenta")
+            tree.root.expand()
+            dir_nodes = {}
+            extension_stats = {}
+            match_count = 0
+            
+            matches = query.iter_matches(node)
+            while True:
+                batch = await asyncio.to_thread(lambda: list(islice(matches, FILTER_BATCH_SIZE)))
+                if generation != self._filter_generation:
+                    return  # A newer filter took over
+                if not batch:
+                    break
+                
+                for file_node in batch:
+                    ext = file_node.get_extension()
+                    entry = extension_stats.get(ext)
+                    if entry is None:
+                        entry = extension_stats[ext] = {'count': 0, 'size': 0, 'files': CompactPathList(), 'sizes': array('q')}
+                    entry['count'] += 1
+                    entry['size'] += file_node.size
+                    entry['files'].append(file_node.path)
+                    entry['sizes'].append(file_node.size)
+                    
+                    if match_count < FILTER_TREE_LIMIT:
+                        parent_path = os.path.dirname(file_node.path)
+                        dir_node = dir_nodes.get(parent_path)
+                        if dir_node is None:
+                            label = os.path.relpath(parent_path, node.path)
+                            dir_node = tree.root.add(
+                                Text(f"[d] {label}", style="bold cyan"),
+                                data=file_node.parent,
+                                expand=True
+                            )
+                            dir_nodes[parent_path] = dir_node
+                        dir_node.add_leaf(self.format_node_label(file_node), data=file_node)
+                    match_count += 1
+                
+                self.extension_data = extension_stats
+                self.stats_source_node = None
+                self._render_extension_table(extension_stats)
+                self.title = f"Disk Octopus | Filter: {match_count} matches..."
+            
+            self.title = f"Disk Octopus | {self.drive_path} | Filter: {match_count} matches"
+        except Exception as e:
+            self.notify(f"Filter error: {e}", severity="error")
+    
     def action_deep_analyze(self) -> None:
-        """Perform deep analysis of file contents using Copilot."""
+        """Queue deep analysis of the selected file's contents using Copilot."""
         if not self.selected_node:
             self.notify("No item selected", severity="warning")
             return
         
-        # Check if it's a directory
-        is_dir = False
-        file_size = 0
-        file_name = ''
-        
-        if isinstance(self.selected_node, dict):
-            # Dict-based node from lazy-loading
-            is_dir = self.selected_node.get('is_dir', False)
-            file_size = self.selected_node.get('size', 0)
-            file_name = self.selected_node.get('name', '')
-        else:
-            # FileNode object
-            is_dir = getattr(self.selected_node, 'is_dir', False)
-            file_size = getattr(self.selected_node, 'size', 0)
-            file_name = getattr(self.selected_node, 'name', '')
+        node = self.selected_node
         
         # Can't read directories
-        if is_dir:
+        if getattr(node, 'is_dir', False):
             self.notify("Cannot read directory contents. Select a file.", severity="warning")
             return
         
-        # Check file size limit for Copilot upload
-        copilot_upload_limit = 5 * 1024 * 1024  # 5MB
-        if file_size > copilot_upload_limit:
-            size_mb = file_size / (1024 * 1024)
-            limit_mb = copilot_upload_limit / (1024 * 1024)
+        if node is self._deep_analysis_current or node in self._deep_analysis_queue:
+            self.notify(f"{node.name} is already queued for deep analysis", severity="warning")
+            return
+        
+        self._deep_analysis_queue.append(node)
+        if self._deep_analysis_current is None:
+            self._start_next_deep_analysis()
+        else:
             self.notify(
-                f"[red]File too large for Copilot analysis[/red]\n\n"
-                f"File size: {size_mb:.1f}MB\n"
-                f"Copilot limit: {limit_mb:.0f}MB\n\n"
-                f"Cannot upload files larger than {limit_mb:.0f}MB to Copilot service.",
-                severity="error",
-                timeout=8
+                f"Deep analysis of {node.name} queued ({len(self._deep_analysis_queue)} waiting)",
+                timeout=3
             )
+    
+    def action_cancel_deep_analysis(self) -> None:
+        """Cancel the running deep analysis; queued ones carry on."""
+        if self._deep_analysis_current is None:
+            self.notify("No deep analysis running", severity="warning")
             return
+        self.workers.cancel_group(self, "deep-analysis")
+    
+    def _start_next_deep_analysis(self) -> None:
+        """Run the next queued deep analysis in a worker, if any."""
+        self._deep_analysis_current = None
+        if not self._deep_analysis_queue:
+            return
+        node = self._deep_analysis_queue.popleft()
+        self._deep_analysis_current = node
+        self.run_worker(self._deep_analyze(node), name=f"deep-analysis {node.path}",
+                        group="deep-analysis", exit_on_error=False)
+    
+    def _show_deep_analysis_status(self, node: FileNode, step: str) -> None:
+        """Show what the running deep analysis is doing in the analysis panel."""
+        waiting = len(self._deep_analysis_queue)
+        try:
+            self.query_one("#analysis-panel", Static).update(
+                f"[bold cyan]⏳ {step} {node.name}...[/bold cyan]\n\n"
+                "[dim]Processing with Copilot AI[/dim]\n\n"
+                "[yellow]Uploading:[/yellow]\n"
+                "• Full file content (up to 5MB)\n"
+                "• All file types supported\n"
+                "• Timeout: 30-45 seconds\n\n"
+                + (f"[dim]{waiting} more queued[/dim]\n" if waiting else "")
+                + "[dim]x to cancel[/dim]"
+            )
+        except Exception:
+            pass
+    
+    async def _deep_analyze(self, node: FileNode) -> None:
+        """Read and analyse one file off the UI thread (the body of a deep-analysis worker).
         
-        # Show immediate popup notification at bottom right
-        self.notify(
-            "[bold yellow]Deep Analysis executing via Copilot[/bold yellow]\n"
-            "[dim]Please be patient...[/dim]",
-            timeout=3
-        )
+        The data/hole map is shown for every file; only files within the
+        Copilot upload limit are read and analysed. Reading reports progress
+        on the progress bar and stops early when the worker is cancelled.
+        The Copilot call itself cannot be interrupted: a cancelled one
+        finishes in its thread and its result is dropped.
+        """
+        cancelled = threading.Event()
+        progress_bar = self.query_one("#progress-bar", ProgressBar)
+        
+        def report(done: int, total: int) -> None:
+            self.ui_updates.post(lambda: progress_bar.update(total=total, progress=done),
+                                 key=("deep-analysis-progress",))
         
         try:
-            # Show immediate status in the analysis panel
-            try:
-                panel = self.query_one("#analysis-panel", Static)
-                panel.update(
-                    "[bold cyan]⏳ Analysing file...[/bold cyan]\n\n"
-                    "[dim]Processing with Copilot AI[/dim]\n\n"
-                    "[yellow]Uploading:[/yellow]\n"
-                    "• Full file content (up to 5MB)\n"
-                    "• All file types supported\n"
-                    "• Timeout: 30-45 seconds\n\n"
-                    "[dim]Please wait...[/dim]"
+            # Data/hole map first: cheap, local, and useful even when Copilot can't take the file
+            extent_text = await asyncio.to_thread(self._extent_map_text, node.path)
+            if extent_text:
+                self.query_one("#deep-analysis-panel", Static).update(extent_text)
+            
+            # Check file size limit for Copilot upload
+            if node.size > COPILOT_UPLOAD_LIMIT:
+                size_mb = node.size / (1024 * 1024)
+                limit_mb = COPILOT_UPLOAD_LIMIT / (1024 * 1024)
+                too_large = f"[red]File too large for Copilot analysis ({size_mb:.1f}MB > {limit_mb:.0f}MB)[/red]"
+                self.query_one("#deep-analysis-panel", Static).update(
+                    f"{extent_text}\n\n{too_large}" if extent_text else too_large
                 )
-                self.refresh()
-            except:
-                pass
+                self.notify(
+                    f"[red]File too large for Copilot analysis[/red]\n\n"
+                    f"File size: {size_mb:.1f}MB\n"
+                    f"Copilot limit: {limit_mb:.0f}MB\n\n"
+                    f"Cannot upload files larger than {limit_mb:.0f}MB to Copilot service.",
+                    severity="error",
+                    timeout=8
+                )
+                return
+            
+            self.notify(
+                f"[bold yellow]Deep Analysis of {node.name} executing via Copilot[/bold yellow]\n"
+                "[dim]Please be patient...[/dim]",
+                timeout=3
+            )
+            self._show_deep_analysis_status(node, "Reading")
+            progress_bar.update(total=max(node.size, 1), progress=0)
             
             # Read file contents
-            file_contents = self._read_file_safely()
+            file_contents = await asyncio.to_thread(self._read_file_safely, node, report, cancelled.is_set)
             if not file_contents:
                 self.notify("Could not read file contents", severity="warning")
                 return
             
             # Get file extension
-            if '.' in file_name:
-                file_ext = '.' + file_name.split('.')[-1].lower()
+            if '.' in node.name:
+                file_ext = '.' + node.name.split('.')[-1].lower()
             else:
                 file_ext = 'unknown'
             
             # Get intelligent analysis of the content
-            analysis = self.copilot_analyzer.analyze_file_contents(
+            self._show_deep_analysis_status(node, "Analysing")
+            progress_bar.update(total=None)  # No progress to report from here on
+            analysis = await asyncio.to_thread(
+                self.copilot_analyzer.analyze_file_contents,
                 file_contents,
-                file_name,
+                node.name,
                 file_ext
             )
             
@@ -1365,68 +2222,93 @@ Click items in the tree to navigate and view details.
             
             # Update deep analysis panel with intelligent analysis results
             try:
-                # Query the new deep analysis panel widget
                 panel = self.query_one("#deep-analysis-panel", Static)
-                
-                # Update the panel with the analysis
-                panel.update(analysis)
+                panel.update(f"{extent_text}\n\n{analysis}" if extent_text else analysis)
                 
                 # Scroll to top of the analysis
                 scroll = self.query_one("#deep-analysis-scroll", VerticalScroll)
                 scroll.scroll_home()
                 
                 # Give user feedback with char count
-                self.notify(f"✓ Deep Analysis Complete ({len(analysis)} chars)", timeout=2)
+                self.notify(f"✓ Deep Analysis of {node.name} Complete ({len(analysis)} chars)", timeout=2)
                 
             except Exception as panel_error:
-                # Log the actual error with full details
-                import traceback
                 error_msg = f"{type(panel_error).__name__}: {panel_error}"
-                tb = traceback.format_exc()
                 self.notify(f"[red]Panel error: {error_msg}[/red]", severity="error", timeout=5)
                 
                 # Fallback: show in notification instead
                 analysis_preview = analysis[:400].replace('\n', ' ')
                 self.notify(f"[bold cyan]Analysis Preview:[/bold cyan]\n{analysis_preview}...", timeout=30)
             
+        except asyncio.CancelledError:
+            cancelled.set()
+            self.notify(f"Deep analysis of {node.name} cancelled", severity="warning", timeout=3)
+            raise
         except Exception as e:
-            import traceback
             error_msg = f"{type(e).__name__}: {e}"
             self.notify(f"[red]Analysis error: {error_msg}[/red]", severity="error", timeout=5)
+        finally:
+            progress_bar.update(total=100, progress=100)
+            self.update_analysis_panel()  # Back to the selected item's details
+            self._start_next_deep_analysis()
     
 
-    def _read_file_safely(self) -> str:
-        """Read file contents safely with size limits."""
-        if not self.selected_node:
+    def _extent_map_text(self, file_path: str) -> str:
+        """Describe a file's data regions and holes (empty where SEEK_DATA is unsupported)."""
+        try:
+            extent_map = data_extents(file_path)
+        except OSError:
+            return ""
+        if extent_map is None or extent_map.size == 0:
             return ""
         
-        # Handle dict-based nodes (from lazy-loading)
-        if isinstance(self.selected_node, dict):
-            file_path = self.selected_node.get('path', '')
-            file_size = self.selected_node.get('size', 0)
-            file_name = self.selected_node.get('name', '')
-        # Handle FileNode objects (legacy)
+        lines = ["[bold cyan]Data Regions:[/bold cyan]"]
+        if extent_map.truncated:
+            lines.append(f"{len(extent_map.extents)}+ regions (map truncated), "
+                         f"{self.format_size(extent_map.data_bytes)}+ data")
         else:
-            if not hasattr(self.selected_node, 'path'):
-                return ""
-            file_path = self.selected_node.path
-            file_size = getattr(self.selected_node, 'size', 0)
-            file_name = getattr(self.selected_node, 'name', '')
+            lines.append(f"{len(extent_map.extents)} regions, "
+                         f"{self.format_size(extent_map.data_bytes)} data, "
+                         f"{self.format_size(extent_map.hole_bytes)} holes")
+        lines.append(f"[green]{extent_map.bar()}[/green]")
+        for offset, length in extent_map.extents[:8]:
+            lines.append(f"  {self.format_size(offset):>10} +{self.format_size(length)}")
+        if len(extent_map.extents) > 8:
+            lines.append(f"  ... {len(extent_map.extents) - 8} more")
+        return "\n".join(lines)
+    
+    def _read_file_safely(self, node: FileNode, progress: Callable = None,
+                          cancelled: Callable = None) -> str:
+        """Read file contents safely with size limits (may run in a worker thread).
+        
+        Args:
+            node: File to read
+            progress: Called with (bytes read, file size) after each chunk
+            cancelled: Returns True to stop reading (the result is then empty)
+        """
+        file_path = getattr(node, 'path', '')
+        file_size = getattr(node, 'size', 0)
         
         if not file_path:
             return ""
         
         try:
-            # Copilot limit for file uploads
-            copilot_upload_limit = 5 * 1024 * 1024  # 5MB
-            
-            if file_size > copilot_upload_limit:
+            if file_size > COPILOT_UPLOAD_LIMIT:
                 return f"[red]File too large for Copilot analysis ({self.format_size(file_size)})[/red]\n(Copilot limit: 5MB)"
             
             # Read the FULL file for analysis - no truncation, no filtering
             # Copilot can handle binary files intelligently
+            content = bytearray()
             with open(file_path, 'rb') as f:
-                content = f.read()
+                while True:
+                    chunk = f.read(DEEP_ANALYSIS_READ_CHUNK)
+                    if not chunk:
+                        break
+                    if cancelled is not None and cancelled():
+                        return ""
+                    content += chunk
+                    if progress is not None:
+                        progress(len(content), max(file_size, len(content)))
             
             # Try to decode as UTF-8, fall back to latin-1 for binary files
             try:
@@ -0,0 +1,188 @@
+"""
+Tree Analytics - Columnar export of a scanned tree for vectorized group-by queries
+"""
+
+from array import array
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from disk_scanner import FileNode
+from size_histogram import build_directory_histograms
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; pure-Python fallbacks are used instead
+    np = None
+
+
+@dataclass
+class TreeColumns:
+    """A scanned FileNode tree flattened into preorder columns.
+
+    Node i's subtree occupies rows [i, subtree_end[i]), so per-subtree totals
+    are contiguous range reductions.
+    """
+    size: object          # int64 per node (0 for directories)
+    ext_id: object        # int32 index into extensions (-1 for directories)
+    depth: object         # int32, root is 0
+    parent: object        # int64 parent row (-1 for the root)
+    mtime: object         # float64 modification time (0 if unknown)
+    is_dir: object        # bool per node
+    subtree_end: object   # int64 exclusive end row of each node's subtree
+    extensions: List[str] = field(default_factory=list)
+    nodes: List[FileNode] = field(default_factory=list)
+    _statistics: Optional[List[Tuple[str, Dict]]] = field(default=None, repr=False)
+
+    @classmethod
+    def from_node(cls, root: FileNode) -> 'TreeColumns':
+        """Flatten a FileNode tree in preorder."""
+        sizes = array('q')
+        ext_ids = array('i')
+        depths = array('i')
+        parents = array('q')
+        mtimes = array('d')
+        dir_flags = array('b')
+        nodes = []
+        extensions = []
+        ext_index = {}
+
+        stack = [(root, -1, 0)]
+        while stack:
+            node, parent_row, depth = stack.pop()
+            row = len(nodes)
+            nodes.append(node)
+            parents.append(parent_row)
+            depths.append(depth)
+            mtimes.append(node.mtime)
+            if node.is_dir:
+                sizes.append(0)
+                ext_ids.append(-1)
+                dir_flags.append(1)
+                # Reversed so children come out in their original order
+                for child in reversed(node.children):
+                    stack.append((child, row, depth + 1))
+            else:
+                ext = node.get_extension()
+                ext_id = ext_index.get(ext)
+                if ext_id is None:
+                    ext_id = ext_index[ext] = len(extensions)
+                    extensions.append(ext)
+                sizes.append(node.size)
+                ext_ids.append(ext_id)
+                dir_flags.append(0)
+
+        subtree_end = _subtree_ends(parents, depths)
+        if np is not None:
+            return cls(
+                size=np.frombuffer(sizes, dtype=np.int64),
+                ext_id=np.frombuffer(ext_ids, dtype=np.int32),
+                depth=np.frombuffer(depths, dtype=np.int32),
+                parent=np.frombuffer(parents, dtype=np.int64),
+                mtime=np.frombuffer(mtimes, dtype=np.float64),
+                is_dir=np.frombuffer(dir_flags, dtype=np.int8).astype(bool),
+                subtree_end=subtree_end,
+                extensions=extensions,
+                nodes=nodes,
+            )
+        return cls(
+            size=sizes, ext_id=ext_ids, depth=depths, parent=parents,
+            mtime=mtimes, is_dir=dir_flags, subtree_end=subtree_end,
+            extensions=extensions, nodes=nodes,
+        )
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def extension_totals(self) -> Dict[str, Dict]:
+        """Get {ext: {'count', 'size'}} for the whole tree."""
+        n_ext = len(self.extensions)
+        if np is not None:
+            files = self.ext_id >= 0
+            ext_ids = self.ext_id[files]
+            counts = np.bincount(ext_ids, minlength=n_ext)
+            sizes = np.bincount(ext_ids, weights=self.size[files], minlength=n_ext)
+            return {
+                ext: {'count': int(counts[i]), 'size': int(sizes[i])}
+                for i, ext in enumerate(self.extensions)
+            }
+
+        totals = {ext: {'count': 0, 'size': 0} for ext in self.extensions}
+        for ext_id, size in zip(self.ext_id, self.size):
+            if ext_id >= 0:
+                entry = totals[self.extensions[ext_id]]
+                entry['count'] += 1
+                entry['size'] += size
+        return totals
+
+    def depth_totals(self) -> List[Tuple[int, int]]:
+        """Get (file count, bytes) of files at each depth."""
+        if np is not None:
+            files = ~self.is_dir
+            depths = self.depth[files]
+            counts = np.bincount(depths)
+            sizes = np.bincount(depths, weights=self.size[files], minlength=counts.size)
+            return [(int(c), int(s)) for c, s in zip(counts, sizes)]
+
+        totals = []
+        for depth, size, flag in zip(self.depth, self.size, self.is_dir):
+            if flag:
+                continue
+            while len(totals) <= depth:
+                totals.append([0, 0])
+            totals[depth][0] += 1
+            totals[depth][1] += size
+        return [tuple(t) for t in totals]
+
+    def subtree_totals(self):
+        """Get total bytes under every node (its preorder range sum)."""
+        if np is not None:
+            # Interleave [start, end) pairs; every other reduceat result is a range sum.
+            # A trailing zero keeps end == len(self) a valid index.
+            padded = np.append(self.size, 0)
+            bounds = np.empty(2 * len(self), dtype=np.int64)
+            bounds[0::2] = np.arange(len(self))
+            bounds[1::2] = self.subtree_end
+            return np.add.reduceat(padded, bounds)[0::2]
+
+        prefix = [0]
+        for size in self.size:
+            prefix.append(prefix[-1] + size)
+        return [prefix[end] - prefix[start] for start, end in enumerate(self.subtree_end)]
+
+    def directory_histograms(self) -> Dict[int, object]:
+        """Get the log2 size histogram of every directory row."""
+        return build_directory_histograms(self.size, self.parent, self.depth, self.is_dir)
+
+    def statistics(self) -> List[Tuple[str, Dict]]:
+        """Get extension statistics sorted by size, with percentages. Cached."""
+        if self._statistics is None:
+            totals = self.extension_totals()
+            total_size = sum(v['size'] for v in totals.values())
+            total_count = sum(v['count'] for v in totals.values())
+            for stats in totals.values():
+                stats['percentage_by_size'] = (stats['size'] / total_size * 100) if total_size > 0 else 0
+                stats['percentage_by_count'] = (stats['count'] / total_count * 100) if total_count > 0 else 0
+            self._statistics = sorted(totals.items(), key=lambda x: x[1]['size'], reverse=True)
+        return self._statistics
+
+
+def _subtree_ends(parents: array, depths: array):
+    """Compute the exclusive preorder end row of every node's subtree."""
+    count = len(parents)
+    if np is not None:
+        parent = np.frombuffer(parents, dtype=np.int64)
+        depth = np.frombuffer(depths, dtype=np.int32)
+        ends = np.arange(1, count + 1, dtype=np.int64)
+        # Push each level's ends up to its parents, deepest level first
+        for level in range(int(depth.max(initial=0)), 0, -1):
+            rows = np.flatnonzero(depth == level)
+            np.maximum.at(ends, parent[rows], ends[rows])
+        return ends
+
+    ends = array('q', range(1, count + 1))
+    # Preorder: every child row is after its parent, so one reverse pass suffices
+    for row in range(count - 1, 0, -1):
+        parent = parents[row]
+        if ends[row] > ends[parent]:
+            ends[parent] = ends[row]
+    return ends
@@ -0,0 +1,403 @@
+"""
+Tree Query - A small filter language evaluated over scanned FileNode trees
+
+Examples:
+    ext in (.log,.gz) and size > 100M and mtime < 30d under /var
+    name ~ "core.*" or size >= 1.5G
+    not ext == .py and uid == 1000
+
+Fields:
+    size            File size; units K, M, G, T (powers of 1024), optional trailing B
+    ext             Extension (.log or log); supports == != in
+    name, path      Glob match with ~, or exact == / !=
+    mtime, atime    Age since modification/access; units s, h, d, w, y
+                    (mtime < 30d means "modified within the last 30 days")
+    uid, gid        Numeric owner/group id
+    under PATH      File is inside PATH
+
+Directories are pruned using their aggregates, e.g. a subtree whose largest
+file is below a size threshold is never walked.
+"""
+
+import fnmatch
+import os
+import re
+import time
+from abc import ABC, abstractmethod
+from typing import Iterator, List, Optional
+
+from disk_scanner import FileNode
+from size_histogram import SIZE_HISTOGRAM_BINS
+
+
+class QueryError(ValueError):
+    """Raised when a query string cannot be parsed."""
+
+
+SIZE_UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4, 'P': 1024 ** 5}
+DURATION_UNITS = {'s': 1, 'h': 3600, 'd': 86400, 'w': 7 * 86400, 'y': 365 * 86400}
+COMPARISONS = {
+    '>': lambda a, b: a > b,
+    '>=': lambda a, b: a >= b,
+    '<': lambda a, b: a < b,
+    '<=': lambda a, b: a <= b,
+    '==': lambda a, b: a == b,
+    '!=': lambda a, b: a != b,
+}
+
+_TOKEN_RE = re.compile(r'''\s*(?:("[^"]*"|'[^']*')|(==|!=|>=|<=|>|<|~|=)|([(),])|([^\s(),<>=!~"']+))''')
+
+
+# ---------------------------------------------------------------------------
+# Predicates: matches(file) decides a file; may_match(directory) returns False
+# only when the directory's aggregates prove no file below it can match.
+# ---------------------------------------------------------------------------
+
+class _Predicate(ABC):
+    @abstractmethod
+    def matches(self, node: FileNode) -> bool:
+        """Whether a file satisfies the predicate."""
+
+    def may_match(self, directory: FileNode) -> bool:
+        return True
+
+
+class _And(_Predicate):
+    def __init__(self, parts: List[_Predicate]):
+        self.parts = parts
+
+    def matches(self, node):
+        return all(part.matches(node) for part in self.parts)
+
+    def may_match(self, directory):
+        return all(part.may_match(directory) for part in self.parts)
+
+
+class _Or(_Predicate):
+    def __init__(self, parts: List[_Predicate]):
+        self.parts = parts
+
+    def matches(self, node):
+        return any(part.matches(node) for part in self.parts)
+
+    def may_match(self, directory):
+        return any(part.may_match(directory) for part in self.parts)
+
+
+class _Not(_Predicate):
+    def __init__(self, inner: _Predicate):
+        self.inner = inner
+
+    def matches(self, node):
+        return not self.inner.matches(node)
+
+
+class _Size(_Predicate):
+    def __init__(self, op: str, value: int):
+        self.op, self.value = op, value
+        self.compare = COMPARISONS[op]
+
+    def matches(self, node):
+        return self.compare(node.size, self.value)
+
+    def may_match(self, directory):
+        aggregate = directory.get_aggregate()
+        largest = aggregate.max_file_size
+        if largest < 0:
+            return False
+        smallest = _smallest_size_bound(aggregate.size_histogram)
+        if self.op in ('>', '>='):
+            return self.compare(largest, self.value)
+        if self.op in ('<', '<='):
+            return self.compare(smallest, self.value)
+        if self.op == '==':
+            return smallest <= self.value <= largest
+        return True
+
+
+class _Extension(_Predicate):
+    def __init__(self, op: str, values: List[str]):
+        self.negate = op == '!='
+        self.values = {_normalize_extension(v) for v in values}
+
+    def matches(self, node):
+        return (node.get_extension() in self.values) != self.negate
+
+    def may_match(self, directory):
+        present = set(directory.get_extension_stats())
+        if self.negate:
+            return bool(present - self.values)
+        return bool(present & self.values)
+
+
+class _Name(_Predicate):
+    def __init__(self, field_name: str, op: str, pattern: str):
+        self.field_name, self.op, self.pattern = field_name, op, pattern
+
+    def matches(self, node):
+        value = getattr(node, self.field_name)
+        if self.op == '~':
+            return fnmatch.fnmatch(value, self.pattern)
+        return (value == self.pattern) == (self.op == '==')
+
+
+class _Age(_Predicate):
+    def __init__(self, field_name: str, op: str, seconds: float, now: float):
+        self.field_name, self.op = field_name, op
+        self.seconds, self.now = seconds, now
+        self.compare = COMPARISONS[op]
+
+    def matches(self, node):
+        stamp = getattr(node, self.field_name)
+        return bool(stamp) and self.compare(self.now - stamp, self.seconds)
+
+    def may_match(self, directory):
+        if self.field_name != 'mtime':
+            return True
+        aggregate = directory.get_aggregate()
+        if not aggregate.newest_mtime:
+            return False
+        if self.op in ('<', '<='):
+            # Some file must be younger than the bound: check the newest one
+            return self.compare(self.now - aggregate.newest_mtime, self.seconds)
+        if self.op in ('>', '>='):
+            return self.compare(self.now - aggregate.oldest_mtime, self.seconds)
+        return True
+
+
+class _Owner(_Predicate):
+    def __init__(self, field_name: str, op: str, value: int):
+        self.field_name, self.op, self.value = field_name, op, value
+        self.compare = COMPARISONS[op]
+
+    def matches(self, node):
+        owner = getattr(node, self.field_name)
+        return owner >= 0 and self.compare(owner, self.value)  # -1: owner unknown
+
+    def may_match(self, directory):
+        if self.op != '==':
+            return True
+        aggregate = directory.get_aggregate()
+        usage = aggregate.owner_usage if self.field_name == 'uid' else aggregate.group_usage
+        return self.value in usage
+
+
+class _Under(_Predicate):
+    def __init__(self, path: str):
+        self.path = os.path.normpath(path)
+        self.prefix = self.path.rstrip(os.sep) + os.sep
+
+    def matches(self, node):
+        return node.path.startswith(self.prefix)
+
+    def may_match(self, directory):
+        dir_path = os.path.normpath(directory.path)
+        # Keep ancestors of the target and anything inside it
+        return self.path == dir_path or self.path.startswith(dir_path.rstrip(os.sep) + os.sep) \
+            or dir_path.startswith(self.prefix)
+
+
+def _smallest_size_bound(histogram) -> int:
+    """Lower bound of the smallest file size recorded in a size histogram."""
+    for index in range(SIZE_HISTOGRAM_BINS):
+        if histogram[index]:
+            return 0 if index == 0 else 1 << (index - 1)
+    return 0
+
+
+def _normalize_extension(value: str) -> str:
+    value = value.lower()
+    if value in ('<no-ext>', '<dir>'):
+        return value
+    return value if value.startswith('.') else f'.{value}'
+
+
+def parse_size(text: str) -> int:
+    """Parse a size literal such as 100M, 1.5G, 512KB or 4096."""
+    match = re.fullmatch(r'(\d+(?:\.\d+)?)\s*([KMGTP]?)(?:I?B)?', text.upper())
+    if not match:
+        raise QueryError(f"Invalid size: {text}")
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2)])
+
+
+def parse_duration(text: str) -> float:
+    """Parse a duration literal such as 30d, 12h or 2y into seconds."""
+    match = re.fullmatch(r'(\d+(?:\.\d+)?)([shdwy]?)', text.lower())
+    if not match:
+        raise QueryError(f"Invalid duration: {text}")
+    return float(match.group(1)) * DURATION_UNITS[match.group(2) or 'd']
+
+
+# ---------------------------------------------------------------------------
+# Parser
+# ---------------------------------------------------------------------------
+
+class _Parser:
+    """Recursive-descent parser: or > and > not > comparison."""
+
+    def __init__(self, text: str, now: float):
+        self.tokens = self._tokenize(text)
+        self.index = 0
+        self.now = now
+
+    @staticmethod
+    def _tokenize(text: str) -> List[str]:
+        tokens = []
+        position = 0
+        text = text.strip()
+        while position < len(text):
+            match = _TOKEN_RE.match(text, position)
+            if not match or match.end() == position:
+                raise QueryError(f"Unexpected character at {position}: {text[position:]}")
+            quoted, operator, punct, word = match.groups()
+            if quoted is not None:
+                tokens.append(('str', quoted[1:-1]))
+            elif operator is not None:
+                tokens.append(('op', '==' if operator == '=' else operator))
+            elif punct is not None:
+                tokens.append((punct, punct))
+            else:
+                tokens.append(('word', word))
+            position = match.end()
+        return tokens
+
+    def _peek(self) -> Optional[tuple]:
+        return self.tokens[self.index] if self.index < len(self.tokens) else None
+
+    def _next(self) -> tuple:
+        token = self._peek()
+        if token is None:
+            raise QueryError("Unexpected end of query")
+        self.index += 1
+        return token
+
+    def _keyword(self, word: str) -> bool:
+        token = self._peek()
+        if token and token[0] == 'word' and token[1].lower() == word:
+            self.index += 1
+            return True
+        return False
+
+    def _value(self) -> str:
+        kind, value = self._next()
+        if kind not in ('word', 'str'):
+            raise QueryError(f"Expected a value, got '{value}'")
+        return value
+
+    def parse(self) -> _Predicate:
+        if not self.tokens:
+            raise QueryError("Empty query")
+        predicate = self._or()
+        if self._peek() is not None:
+            raise QueryError(f"Unexpected '{self._peek()[1]}'")
+        return predicate
+
+    def _or(self) -> _Predicate:
+        parts = [self._and()]
+        while self._keyword('or'):
+            parts.append(self._and())
+        return parts[0] if len(parts) == 1 else _Or(parts)
+
+    def _and(self) -> _Predicate:
+        parts = [self._not()]
+        while True:
+            if self._keyword('and'):
+                parts.append(self._not())
+            elif self._peek() and self._peek()[0] == 'word' and self._peek()[1].lower() == 'under':
+                # "... under /var" reads naturally without an explicit "and"
+                parts.append(self._not())
+            else:
+                break
+        return parts[0] if len(parts) == 1 else _And(parts)
+
+    def _not(self) -> _Predicate:
+        if self._keyword('not'):
+            return _Not(self._not())
+        return self._atom()
+
+    def _atom(self) -> _Predicate:
+        token = self._peek()
+        if token and token[0] == '(':
+            self._next()
+            predicate = self._or()
+            if self._next()[0] != ')':
+                raise QueryError("Expected ')'")
+            return predicate
+
+        field_name = self._value().lower()
+        if field_name == 'under':
+            return _Under(self._value())
+
+        if field_name == 'ext' and self._keyword('in'):
+            return _Extension('==', self._value_list())
+
+        kind, op = self._next()
+        if kind != 'op':
+            raise QueryError(f"Expected a comparison after '{field_name}'")
+
+        if field_name == 'size':
+            self._reject(op, ('~',), field_name)
+            return _Size(op, parse_size(self._value()))
+        if field_name == 'ext':
+            self._reject(op, ('~', '<', '<=', '>', '>='), field_name)
+            return _Extension(op, [self._value()])
+        if field_name in ('name', 'path'):
+            self._reject(op, ('<', '<=', '>', '>='), field_name)
+            return _Name(field_name, op, self._value())
+        if field_name in ('mtime', 'atime'):
+            self._reject(op, ('~',), field_name)
+            return _Age(field_name, op, parse_duration(self._value()), self.now)
+        if field_name in ('uid', 'gid'):
+            self._reject(op, ('~',), field_name)
+            value = self._value()
+            if not value.isdigit():
+                raise QueryError(f"{field_name} must be numeric")
+            return _Owner(field_name, op, int(value))
+        raise QueryError(f"Unknown field '{field_name}'")
+
+    def _value_list(self) -> List[str]:
+        if self._next()[0] != '(':
+            raise QueryError("Expected '(' after 'in'")
+        values = [self._value()]
+        while True:
+            kind, value = self._next()
+            if kind == ')':
+                return values
+            if kind != ',':
+                raise QueryError("Expected ',' or ')'")
+            values.append(self._value())
+
+    @staticmethod
+    def _reject(op: str, invalid: tuple, field_name: str):
+        if op in invalid:
+            raise QueryError(f"Operator '{op}' is not supported for {field_name}")
+
+
+class TreeQuery:
+    """A parsed query that can be run against FileNode trees."""
+
+    def __init__(self, text: str, now: Optional[float] = None):
+        """Parse a query string.
+
+        Raises:
+            QueryError: If the query is malformed
+        """
+        self.text = text
+        self.predicate = _Parser(text, now if now is not None else time.time()).parse()
+
+    def matches(self, node: FileNode) -> bool:
+        """Check a single file against the query."""
+        return not node.is_dir and self.predicate.matches(node)
+
+    def iter_matches(self, root: FileNode) -> Iterator[FileNode]:
+        """Lazily yield matching files under root, skipping subtrees that cannot match."""
+        stack = [root]
+        while stack:
+            directory = stack.pop()
+            if not self.predicate.may_match(directory):
+                continue
+            for child in directory.children:
+                if child.is_dir:
+                    stack.append(child)
+                elif self.predicate.matches(child):
+                    yield child
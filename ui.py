@@ -381,10 +381,11 @@ class TerminalUI:
         console.print()
         
         # Risk check
-        risk = self.file_type_analyzer.copilot.check_security_risks(extension, stat['files'])
+        locations = list(self.file_type_analyzer.iter_file_paths(self.current_node, extension))
+        risk = self.file_type_analyzer.copilot.check_security_risks(extension, locations)
         
         # Get copilot analysis
-        analysis = self.file_type_analyzer.analyze_file_type(extension, stat)
+        analysis = self.file_type_analyzer.analyze_file_type(extension, stat, self.current_node)
         
         # Show all info
         info = f"""[cyan]📁 Analysis: {extension}[/cyan]
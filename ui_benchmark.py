@@ -0,0 +1,175 @@
+"""
+UI Benchmark - Drive DiskVisualizerApp headlessly with Textual's Pilot and time it
+Measures first tree paint, expand latency, stats-table updates and memory over
+synthetic directories, and writes JSON that performance_profiler.py can compare.
+
+Usage:
+    python ui_benchmark.py [--sizes 1000,100000,1000000] [--fixtures DIR] [--output FILE]
+    python performance_profiler.py --compare old.json new.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, List, Optional
+
+import psutil
+import textual
+from textual.app import App
+from textual.widgets import DataTable, Tree
+
+from cache_manager import get_cache
+from disk_scanner import FileNode
+from textual_ui import DiskVisualizerApp
+
+# Children per synthetic directory
+DEFAULT_SIZES = [1000, 100000, 1000000]
+
+# Seconds between condition checks while waiting for the UI
+POLL_INTERVAL = 0.005
+
+# Seconds to wait for any single measurement before giving up
+MEASURE_TIMEOUT = 600.0
+
+
+def build_fixtures(root: str, sizes: List[int]) -> str:
+    """Create root/n<count>/ directories holding <count> empty files each.
+
+    Files are named f<i>.b<count> so the stats table of each directory has its
+    own extension. Existing complete fixtures are reused between runs.
+    """
+    os.makedirs(root, exist_ok=True)
+    for count in sizes:
+        directory = os.path.join(root, f"n{count}")
+        marker = os.path.join(root, f".n{count}.complete")
+        if os.path.exists(marker):
+            continue
+        os.makedirs(directory, exist_ok=True)
+        for index in range(count):
+            open(os.path.join(directory, f"f{index:07d}.b{count}"), 'wb').close()
+        open(marker, 'wb').close()
+    return root
+
+
+def rss_mb() -> float:
+    """Resident memory of this process in MB."""
+    return psutil.Process(os.getpid()).memory_info().rss / 1024 / 1024
+
+
+class BenchmarkApp(App):
+    """Hosts DiskVisualizerApp the same way MainApp does after drive selection."""
+
+    CSS_PATH = "textual_ui.css"
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+
+    def on_mount(self) -> None:
+        self.push_screen(DiskVisualizerApp(self.path))
+
+
+async def _wait_for(pilot, condition: Callable[[], bool]) -> Optional[float]:
+    """Seconds until condition() holds, or None on timeout."""
+    start = time.perf_counter()
+    while not condition():
+        if time.perf_counter() - start > MEASURE_TIMEOUT:
+            return None
+        await pilot.pause(POLL_INTERVAL)
+    return time.perf_counter() - start
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds * 1000, 2) if seconds is not None else None
+
+
+async def run_benchmark(fixtures: str, sizes: List[int]) -> dict:
+    """Run every measurement once and return the metrics."""
+    metrics = {'expand_ms': {}, 'stats_update_ms': {}}
+    # Cold runs only: a cached tree would skip the listings being measured
+    get_cache().clear_cache(fixtures)
+    rss_start = rss_mb()
+    app = BenchmarkApp(fixtures)
+
+    start = time.perf_counter()
+    async with app.run_test(size=(160, 50)) as pilot:
+        screen = app.screen
+        tree = screen.query_one("#file-tree", Tree)
+        await _wait_for(pilot, lambda: any(isinstance(c.data, FileNode) for c in tree.root.children))
+        metrics['first_paint_ms'] = _ms(time.perf_counter() - start)
+
+        # Measure cold listings: read-ahead would otherwise list them early
+        screen.prefetcher.stop()
+        stats_table = screen.query_one("#stats-table", DataTable)
+
+        for count in sizes:
+            node = next(
+                (c for c in tree.root.children
+                 if isinstance(c.data, FileNode) and c.data.name == f"n{count}"),
+                None
+            )
+            if node is None:
+                continue
+            stats_table.clear()
+            tree.select_node(node)
+            await pilot.pause()
+
+            selected = time.perf_counter()
+            tree.action_select_cursor()
+            expand = await _wait_for(
+                pilot, lambda: node.data.is_scanned and all(child.data is not None for child in node.children)
+            )
+            metrics['expand_ms'][str(count)] = _ms(expand)
+            stats = await _wait_for(
+                pilot, lambda: f".b{count}" in screen.extension_data and stats_table.row_count > 0
+            )
+            metrics['stats_update_ms'][str(count)] = _ms(
+                time.perf_counter() - selected if stats is not None else None
+            )
+
+    get_cache().clear_cache(fixtures)
+    metrics['rss_mb'] = round(rss_mb(), 1)
+    metrics['rss_delta_mb'] = round(metrics['rss_mb'] - rss_start, 1)
+    return metrics
+
+
+def main():
+    """Build fixtures, run the benchmark and write the JSON results."""
+    parser = argparse.ArgumentParser(description="Headless UI latency benchmark")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+                        help="Comma-separated child counts of the synthetic directories")
+    parser.add_argument("--fixtures", default=os.path.join(tempfile.gettempdir(), "disk-octopus-bench"),
+                        help="Directory for (reused) synthetic fixtures")
+    parser.add_argument("--output", default="ui_benchmark.json", help="JSON results file")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    print(f"Preparing fixtures in {args.fixtures}...")
+    build_fixtures(args.fixtures, sizes)
+
+    print("Running UI benchmark...")
+    metrics = asyncio.run(run_benchmark(args.fixtures, sizes))
+    results = {
+        'benchmark': 'ui',
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'textual': textual.__version__,
+        'platform': sys.platform,
+        'fixture_sizes': sizes,
+        'metrics': metrics,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    print(json.dumps(metrics, indent=2))
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
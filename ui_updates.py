@@ -0,0 +1,56 @@
+"""
+UI Updates - Coalesce widget changes from workers into a few batches per second
+"""
+
+import threading
+from collections import OrderedDict
+from itertools import count
+from typing import Callable, Hashable, Optional
+
+# Maximum batches applied to the UI per second
+UI_UPDATE_RATE = 20
+
+
+class UpdateQueue:
+    """Thread-safe queue of pending UI changes, drained in one batch per frame.
+
+    Workers post callables instead of touching widgets. Updates posted with
+    the same key replace each other, so a label rewritten a hundred times
+    between frames is applied once, at its latest value.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = OrderedDict()  # key -> callable, in posting order
+        self._unique = count()
+        self._refresh = False
+
+    def post(self, apply: Callable[[], None], key: Optional[Hashable] = None):
+        """Queue a change; a pending change with the same key is replaced."""
+        with self._lock:
+            if key is None:
+                key = ('unique', next(self._unique))
+            else:
+                self._pending.pop(key, None)
+            self._pending[key] = apply
+
+    def request_refresh(self):
+        """Ask for one screen refresh with the next batch."""
+        self._refresh = True
+
+    def drain(self) -> bool:
+        """Apply every pending change (UI thread only).
+
+        Returns:
+            True if anything was applied or a refresh was requested
+        """
+        with self._lock:
+            pending = list(self._pending.values())
+            self._pending.clear()
+            refresh, self._refresh = self._refresh, False
+        for apply in pending:
+            try:
+                apply()
+            except Exception:
+                pass  # One stale update (e.g. a removed node) must not block the rest
+        return bool(pending) or refresh